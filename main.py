@@ -1,16 +1,24 @@
+import time
+STARTUP = time.perf_counter()
+
 import sys
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QTreeView, QTabWidget, QFileDialog,
-    QVBoxLayout, QSplitter, QTextEdit, QHeaderView, QAbstractItemView
+    QApplication, QMainWindow, QWidget, QTreeView, QFileDialog,
+    QVBoxLayout, QSplitter, QPlainTextEdit, QHeaderView, QAbstractItemView
 )
-from PySide6.QtCore import Qt, QDir
+from PySide6.QtCore import Qt, QDir, QTimer
+from PySide6.QtGui import QAction
 import os
 
 # === Import Tabs ===
-from src.GUI import H5ANTTab, FileSummaryTab, S2PTab
-from src.GUI.CustomWidgets import FileExplorer
+# The tabs (and matplotlib with them) are imported when first opened, see LazyTabWidget
+import src.GUI as GUI
+from src.GUI.CustomWidgets import FileExplorer, LazyTabWidget
+from src.structs import measurement_cache, sidecar_cache
 from src.util import Logging, Path
 
+STARTUP_BUDGET = 1.0 # s, from the first line of main.py (interpreter start-up not included) until the main window is shown
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -22,17 +30,16 @@ class MainWindow(QMainWindow):
         self.file_explorer = FileExplorer()
 
         # === Tabs ===
-        self.tabs = QTabWidget()
-        self.plotting_tab = H5ANTTab()
-        self.summary_tab = FileSummaryTab()
-        self.s2p_tab = S2PTab()
-        self.tabs.addTab(self.plotting_tab, self.plotting_tab.description)
-        self.tabs.addTab(self.summary_tab, self.summary_tab.description)
-        self.tabs.addTab(self.s2p_tab, self.s2p_tab.description)
+        self.tabs = LazyTabWidget()
+        self.plotting_index = self.tabs.add_lazy_tab(lambda: GUI.H5ANTTab(), 'h5ant')
+        self.summary_index = self.tabs.add_lazy_tab(self.create_summary_tab, 'Summary')
+        self.s2p_index = self.tabs.add_lazy_tab(lambda: GUI.S2PTab(), 's2p')
+        self.performance_index = self.tabs.add_lazy_tab(lambda: GUI.PerformanceTab(), 'Performance')
+        self.selected_file = None
 
 
         # === Bottom Output Box ===
-        self.log_display = QTextEdit()
+        self.log_display = QPlainTextEdit()
         self.log_display.setPlaceholderText("Output / Logs")
         self.log_display.setMaximumHeight(150)
         self.log_display.setReadOnly(True)
@@ -54,19 +61,58 @@ class MainWindow(QMainWindow):
         # === Menu Bar ===
         menu_bar = self.menuBar()
         file_menu = menu_bar.addMenu("File")
+        clear_cache_action = QAction("Clear measurement cache", self)
+        clear_cache_action.triggered.connect(self.clear_cache)
+        file_menu.addAction(clear_cache_action)
 
         # === Signals ===
         self.file_explorer.selection_connect(self.on_file_selected)
 
+    @property
+    def plotting_tab(self):
+        return self.tabs.content(self.plotting_index)
+
+    @property
+    def summary_tab(self):
+        return self.tabs.content(self.summary_index)
+
+    @property
+    def s2p_tab(self):
+        return self.tabs.content(self.s2p_index)
+
+    def create_summary_tab(self):
+        summary_tab = GUI.FileSummaryTab()
+        if self.selected_file is not None: summary_tab.update_summary(self.selected_file)
+        return summary_tab
+
+    def clear_cache(self) -> None:
+        measurement_cache.clear()
+        sidecar_cache.clear()
+        Logging.get_logger('Main').info('Cleared measurement cache')
+
     def on_file_selected(self, selected, deselected):
         indexes = selected.indexes()
         if not indexes: return
 
         index = indexes[0]
         file_path = self.file_explorer.file_path(index)
+        self.selected_file = file_path
+
+        # Call the tab's method to update its summary, an unopened tab picks it up when created
+        if self.summary_tab is not None: self.summary_tab.update_summary(file_path)
+
+
+    def startup_finished(self) -> None:
+        elapsed = time.perf_counter() - STARTUP
+        logger = Logging.get_logger('Main')
+        if elapsed > STARTUP_BUDGET:
+            logger.warning(f'Startup took {elapsed:.2f} s, over the {STARTUP_BUDGET:.1f} s budget')
+        else:
+            logger.info(f'Started in {elapsed:.2f} s')
 
-        # Call the tab's method to update its summary
-        self.summary_tab.update_summary(file_path)
+        # The window is up, now build whichever tab is showing and catch the index up in the background
+        self.tabs.ensure_current()
+        self.file_explorer.index_folder(self.file_explorer.current_path)
 
 
 if __name__ == "__main__":
@@ -74,4 +120,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
+    QTimer.singleShot(0, window.startup_finished)
     sys.exit(app.exec())
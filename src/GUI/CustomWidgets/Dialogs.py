@@ -1,7 +1,8 @@
 from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QDialog, QListWidget,
     QLineEdit, QDialogButtonBox, QPushButton, QLabel,
-    QListWidgetItem, QColorDialog, QColorDialog, QSizePolicy, QWidget
+    QListWidgetItem, QColorDialog, QColorDialog, QSizePolicy, QWidget,
+    QFormLayout, QCheckBox, QFileDialog, QAbstractItemView
 )
 from PySide6.QtGui import QColor
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
@@ -84,6 +85,89 @@ class SaveFigureDialog(QDialog):
         super().accept()
 
 
+class ExportDialog(QDialog):
+    '''Pick the files, frequencies and formats for a batch figure export.'''
+    def __init__(self, file_paths, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Figures")
+
+        self.file_paths = []
+        self.frequencies = ()
+        self.formats = ()
+
+        layout = QVBoxLayout(self)
+
+        self.file_list = QListWidget()
+        self.file_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.file_list.addItems(file_paths)
+        file_buttons = QHBoxLayout()
+        add_button = QPushButton('Add files...')
+        add_button.clicked.connect(self.add_files)
+        remove_button = QPushButton('Remove selected')
+        remove_button.clicked.connect(self.remove_selected)
+        file_buttons.addWidget(add_button)
+        file_buttons.addWidget(remove_button)
+
+        form = QFormLayout()
+        self.frequency_field = QLineEdit()
+        self.frequency_field.setPlaceholderText('e.g. 1, 1.25, 1.5 (empty for all)')
+        form.addRow('Frequencies [GHz]:', self.frequency_field)
+
+        format_layout = QHBoxLayout()
+        self.format_boxes = {extension: QCheckBox(extension) for extension in ('png', 'pdf')}
+        self.format_boxes['png'].setChecked(True)
+        for box in self.format_boxes.values():
+            format_layout.addWidget(box)
+        form.addRow('Formats:', format_layout)
+
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet('color: red')
+        self.error_label.hide()
+
+        layout.addWidget(QLabel('Files:'))
+        layout.addWidget(self.file_list)
+        layout.addLayout(file_buttons)
+        layout.addLayout(form)
+        layout.addWidget(self.error_label)
+
+        # Dialog buttons
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def add_files(self) -> None:
+        paths, _ = QFileDialog.getOpenFileNames(self, 'Add measurements', '', 'Antenna measurements (*.h5ant)')
+        existing = {self.file_list.item(i).text() for i in range(self.file_list.count())}
+        self.file_list.addItems([path for path in paths if path not in existing])
+
+    def remove_selected(self) -> None:
+        for item in self.file_list.selectedItems():
+            self.file_list.takeItem(self.file_list.row(item))
+
+    def show_error(self, message) -> None:
+        self.error_label.setText(message)
+        self.error_label.show()
+
+    def accept(self):
+        try:
+            frequencies = tuple(float(value)*1e9 for value in self.frequency_field.text().replace(',', ' ').split())
+        except ValueError:
+            self.show_error('Frequencies must be numbers in GHz')
+            return
+        formats = tuple(extension for extension, box in self.format_boxes.items() if box.isChecked())
+        if not formats:
+            self.show_error('Select at least one format')
+            return
+        if not self.file_list.count():
+            self.show_error('Add at least one file')
+            return
+
+        self.file_paths = [self.file_list.item(i).text() for i in range(self.file_list.count())]
+        self.frequencies = frequencies
+        self.formats = formats
+        super().accept()
+
 
 class PreviewCanvas(FigureCanvas):
     def __init__(self):
@@ -1,24 +1,119 @@
 from PySide6.QtWidgets import (
-    QWidget, QTreeView, QPushButton,
+    QWidget, QTreeView, QPushButton, QMenu,
     QHBoxLayout, QVBoxLayout, QFileSystemModel, QStyle, QAbstractItemView, QHeaderView
 )
-from PySide6.QtCore import QModelIndex, Qt, QDir
+from PySide6.QtCore import QModelIndex, Qt, QDir, QThreadPool, QTimer, Signal
 import os
 
+from src.structs import measurement_index
+from src.util import Logging
+
+from .Workers import BackgroundTask, BatchLoader
+
+MEASUREMENT_SUFFIXES = ('.h5ant', '.s2p')
+METRIC_COLUMNS = ('Frequency span', 'Peak', 'HPBW', 'Points')
+FIRST_METRIC_COLUMN = 4 # after Name, Size, Type and Date modified
+
+# Looked up once, enum attribute access is measurable in data()
+DISPLAY, TOOLTIP, ALIGNMENT = Qt.DisplayRole, Qt.ToolTipRole, Qt.TextAlignmentRole
+RIGHT_ALIGNED = int(Qt.AlignRight | Qt.AlignVCenter)
+
+
+def file_summary(path) -> dict:
+    # Runs on the model's thread pool, the index only parses the file if it changed since it was indexed
+    return measurement_index.entry(path) or measurement_index.add(path)
+
+
+def format_metric(row: dict, name: str) -> str | None:
+    if row.get('error'): return '!' if name == METRIC_COLUMNS[0] else None
+    h5ant = row['kind'] == 'h5ant'
+    match name:
+        case 'Frequency span': return f"{row['f_min']/1e9:.4g}–{row['f_max']/1e9:.4g} GHz"
+        case 'Peak': return f"{row['peak']:.1f} dB" if h5ant else None
+        case 'HPBW': return f"{row['hpbw']:.1f}°" if h5ant and row['hpbw'] is not None else None
+        case 'Points': return f"{row['n_angles']} × {row['n_frequencies']}" if h5ant else str(row['n_frequencies'])
+
+
 class CustomFileSystemModel(QFileSystemModel):
+    '''File system model with optional metric columns for measurement files.
+
+    Metrics are read from the measurement index on a worker thread and kept in memory by path and
+    modification time, so painting never touches the file system or HDF5 on the GUI thread.
+    '''
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.metrics = {} # path: (modified [ms], column texts, error)
+        self.requested = set()
+
+        pool = QThreadPool(self)
+        # Own single thread: the global pool stays free for plot loads, and h5py serializes reads anyway
+        pool.setMaxThreadCount(1)
+        self.loader = BatchLoader(file_summary, self, pool)
+        self.loader.file_loaded.connect(self.on_metrics_loaded)
+        self.loader.file_failed.connect(self.on_metrics_failed)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.column() > 0 else FIRST_METRIC_COLUMN + len(METRIC_COLUMNS)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole):
+        if section >= FIRST_METRIC_COLUMN and orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return METRIC_COLUMNS[section - FIRST_METRIC_COLUMN]
+        return super().headerData(section, orientation, role)
+
     def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
-        if index.column() == 2 and role == Qt.DisplayRole:  # Column 2 = "Type"
-            file_path = self.filePath(index)
-            if os.path.isdir(file_path):
+        column = index.column()
+        if column == 2 and role == DISPLAY:  # Column 2 = "Type"
+            # isDir and filePath come from the model's cached nodes, no stat per paint
+            if self.isDir(index):
                 return "Folder"
             else:
-                return os.path.splitext(file_path)[1]  # Extension like '.png'
-        return super().data(index, role)
+                return os.path.splitext(self.filePath(index))[1]  # Extension like '.png'
+        if column < FIRST_METRIC_COLUMN: return super().data(index, role)
+
+        # Called for every role of every visible cell on each paint, so only dictionary lookups from here
+        if role == ALIGNMENT: return RIGHT_ALIGNED
+        if role != DISPLAY and role != TOOLTIP: return None
+        path = self.filePath(index)
+        if not path.lower().endswith(MEASUREMENT_SUFFIXES): return None
+        modified = self.lastModified(index).toMSecsSinceEpoch()
+        cached = self.metrics.get(path)
+        if cached is None or cached[0] != modified:
+            self.request_metrics(path)
+            return '…' if role == DISPLAY else None
+        if role == TOOLTIP: return cached[2]
+        return cached[1][column - FIRST_METRIC_COLUMN]
+
+    def request_metrics(self, path) -> None:
+        if path in self.requested or path in self.loader.pending: return
+        # Collect the requests of one paint and hand them to the loader together
+        if not self.requested: QTimer.singleShot(0, self.flush_requests)
+        self.requested.add(path)
+
+    def flush_requests(self) -> None:
+        self.loader.load(sorted(self.requested))
+        self.requested.clear()
+
+    def on_metrics_loaded(self, path, row) -> None:
+        index = self.index(path)
+        if not index.isValid(): return
+        texts = tuple(format_metric(row, name) for name in METRIC_COLUMNS)
+        self.metrics[path] = (self.lastModified(index).toMSecsSinceEpoch(), texts, row.get('error'))
+        self.dataChanged.emit(self.index(path, FIRST_METRIC_COLUMN), self.index(path, FIRST_METRIC_COLUMN + len(METRIC_COLUMNS) - 1))
+
+    def on_metrics_failed(self, path, message) -> None:
+        # Kept like a result, so an unreadable file is only retried once it changes
+        self.on_metrics_loaded(path, {'error': message})
 
 
 class FileExplorer(QWidget):
+    # Emitted with the IndexUpdate after each background pass of the measurement index
+    index_updated = Signal(object)
+
     def __init__(self):
         super().__init__()
+        self.logger = Logging.get_logger('FileExplorer')
+        self.index_task = None
+        self.index_queue = []
 
         self.setWindowTitle("QTreeView with Navigation Icons")
 
@@ -46,6 +141,15 @@ class FileExplorer(QWidget):
         header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
 
+        # Metric columns are opt-in from the header's context menu, hidden columns are never computed.
+        # Fixed widths, sizing to contents would query every row each time one file's metrics arrive
+        for offset in range(len(METRIC_COLUMNS)):
+            self.tree.hideColumn(FIRST_METRIC_COLUMN + offset)
+            header.setSectionResizeMode(FIRST_METRIC_COLUMN + offset, QHeaderView.Interactive)
+            header.resizeSection(FIRST_METRIC_COLUMN + offset, 110 if offset == 0 else 80)
+        header.setContextMenuPolicy(Qt.CustomContextMenu)
+        header.customContextMenuRequested.connect(self.open_header_menu)
+
 
         self.current_path = home_dir
         self.history = [home_dir]
@@ -101,6 +205,7 @@ class FileExplorer(QWidget):
         self.history_index += 1
 
         self.update_buttons()
+        self.index_folder(path)
 
     def go_back(self):
         if self.history_index > 0:
@@ -130,6 +235,40 @@ class FileExplorer(QWidget):
         if os.path.isdir(path):
             self.set_path(path)
 
+    def open_header_menu(self, pos) -> None:
+        menu = QMenu(self)
+        for offset, name in enumerate(METRIC_COLUMNS):
+            column = FIRST_METRIC_COLUMN + offset
+            action = menu.addAction(name)
+            action.setCheckable(True)
+            action.setChecked(not self.tree.isColumnHidden(column))
+            action.toggled.connect(lambda checked, column=column: self.tree.setColumnHidden(column, not checked))
+        menu.exec(self.tree.header().mapToGlobal(pos))
+
+    def index_folder(self, path) -> None:
+        '''Bring the measurement index up to date for everything under path, on a worker thread.'''
+        if self.index_task is not None:
+            # One pass at a time, they would parse the same files
+            if path not in self.index_queue: self.index_queue.append(path)
+            return
+        self.index_task = BackgroundTask(measurement_index.update, path, parent=self)
+        self.index_task.signals.finished.connect(self.on_index_finished)
+        self.index_task.signals.failed.connect(self.on_index_failed)
+        self.index_task.start()
+
+    def on_index_finished(self, result) -> None:
+        self.index_updated.emit(result)
+        self.next_index_folder()
+
+    def on_index_failed(self, message) -> None:
+        self.logger.error(f'Failed to update the measurement index: {message}')
+        self.next_index_folder()
+
+    def next_index_folder(self) -> None:
+        self.index_task.signals.deleteLater() # Parented to the explorer, it would live as long as the window
+        self.index_task = None
+        if self.index_queue: self.index_folder(self.index_queue.pop(0))
+
     def file_path(self, index) -> str:
         return self.model.filePath(index)
     
@@ -1,21 +1,23 @@
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QFrame, QDialog, QMenu
+    QWidget, QVBoxLayout, QFrame, QDialog, QMenu, QProgressBar
 )
 
 from PySide6.QtCore import Qt, QPoint, Signal
 from PySide6.QtGui import QAction
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
 import os
 
 
 from src.enums import Normalization
-from src.structs import AntennaMeasurement
-from src.util import Logging, Path
+from src.structs import measurement_cache, ExtremesTracker
+from src.util import Logging, Path, Tracing
 
 from .Dialogs import RenameLineDialog, SaveFigureDialog, ColorDialog
+from .Workers import BatchLoader
+from .TracedCanvas import TracedCanvas
+from .VirtualGrid import CanvasHost
 
 class H5ANTWidget(QFrame):
     # Signal emitted when this plot widget wants to be removed
@@ -27,20 +29,29 @@ class H5ANTWidget(QFrame):
         self.layout = QVBoxLayout()
         self.figure = Figure()
 
-        self.canvas = FigureCanvas(self.figure)
+        self.canvas = TracedCanvas(self.figure, 'h5ant')
         self.canvas.setMouseTracking(True)
         self.canvas.installEventFilter(self)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
 
         self.ax = self.figure.add_subplot(111, projection='polar')
         self.ax.set_theta_zero_location("N")
         self.legend = None
-        
-        self.layout.addWidget(self.canvas)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat('Loading %v/%m')
+        self.progress_bar.hide()
+
+        self.canvas_host = CanvasHost(self.canvas)
+        self.canvas_host.resumed.connect(self.on_resumed)
+        self.layout.addWidget(self.canvas_host)
+        self.layout.addWidget(self.progress_bar)
         self.setLayout(self.layout)
 
         self.setAcceptDrops(True)
         self.plotted_files = {}  # file_path: matplotlib line object
-        self.plotted_meas = {} # file_path: AntennaMeasurement
+        self.plotted_meas = {} # file_path: MultiFrequencyMeasurement
+        self.frequency = None # Hz, every file shows its closest frequency. None for their last ones
 
         # Enable context menu
         self.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -49,6 +60,21 @@ class H5ANTWidget(QFrame):
         self.tab_parent = parent
         self.peak = None
         self.floor = None
+        self.extremes = ExtremesTracker() # file_path: (peak, floor) of the plotted measurements
+        self.dirty = True # Data, labels or colors changed since the last render
+
+        # Blitted frequency playback, see start_animation
+        self.animation_offsets = None
+        self.animation_indices = {} # file_path: frequency index of every frame
+        self.animation_stride = 1
+        self.background = None
+
+        self.loader = BatchLoader(measurement_cache.load, self)
+        self.loader.file_loaded.connect(self.add_measurement)
+        self.loader.file_failed.connect(self.on_load_failed)
+        self.loader.progress.connect(self.on_load_progress)
+        self.loader.finished.connect(self.on_load_finished)
+        self.loaded_in_batch = False
 
         self.logger = Logging.get_logger('h5ant Widget')
 
@@ -61,28 +87,40 @@ class H5ANTWidget(QFrame):
 
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
-            updated = False
+            file_paths = []
             for url in event.mimeData().urls():
                 file_path = url.toLocalFile()
                 ext = os.path.splitext(file_path)[1].lower()
-                if ext in ['.h5ant']:
-                    if self.plot_file(file_path):
-                        updated = True
-            if updated:
-                self.tab_parent.global_update()
+                if ext in ['.h5ant'] and file_path not in self.plotted_files:
+                    file_paths.append(file_path)
+            self.loader.load(file_paths)
             event.acceptProposedAction()
 
 
+    def on_load_progress(self, done: int, total: int) -> None:
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setVisible(done < total)
+
+    def on_load_failed(self, file_path, message) -> None:
+        self.logger.error(f"Failed to plot {file_path}: {message}")
+
+    def on_load_finished(self) -> None:
+        self.progress_bar.hide()
+        if not self.loaded_in_batch: return
+        self.loaded_in_batch = False
+        self.tab_parent.global_update()
+
+
     def determine_local_extremes(self) -> None:
-        peak = -np.inf
-        floor = np.inf
-        for value in self.plotted_meas.values():
-            if value.peak > peak: peak = value.peak
-            if value.floor < floor: floor = value.floor
-        self.peak = peak
-        self.floor = floor
-        
+        # The tracker is kept up to date as files come and go, this only publishes it to the tab
+        if (self.peak, self.floor) == (self.extremes.peak, self.extremes.floor): return
+        self.peak = self.extremes.peak
+        self.floor = self.extremes.floor
+        self.tab_parent.update_widget_extremes(self)
+
 
+    @Tracing.traced('normalize')
     def normalize(self) -> None:
         norm_mode = self.tab_parent.normalization_mode
         match norm_mode:
@@ -104,15 +142,27 @@ class H5ANTWidget(QFrame):
             return False  # Already plotted
 
         try:
-            meas = AntennaMeasurement.from_file(file_path)
-            label = os.path.basename(file_path).strip('.h5ant')
-            line, = self.ax.plot(meas.angles_rad, meas.power, label=label)
-            self.plotted_files[file_path] = line
-            self.plotted_meas[file_path] = meas
-            return True
+            meas = measurement_cache.load(file_path)
         except Exception as e:
             self.logger.error(f"Failed to plot {file_path}: {e}")
             return False
+        return self.add_measurement(file_path, meas)
+
+    def add_measurement(self, file_path, meas) -> bool:
+        if file_path in self.plotted_files:
+            return False
+
+        meas = meas.select(self.selected_index(meas))
+        label = os.path.basename(file_path).strip('.h5ant')
+        line, = self.ax.plot(meas.angles_rad, meas.power, label=label)
+        self.plotted_files[file_path] = line
+        self.plotted_meas[file_path] = meas
+        self.extremes.add(file_path, meas.peak, meas.floor)
+        self.loaded_in_batch = True
+        self.dirty = True
+        # Show lines as they arrive, suspended canvases stay dirty until they are resumed
+        if self.loader.busy and self.canvas_host.onscreen: self.canvas.draw_idle()
+        return True
 
     def open_context_menu(self, pos: QPoint):
         menu = QMenu(self)
@@ -132,6 +182,19 @@ class H5ANTWidget(QFrame):
             color_action.triggered.connect(self.change_color_dialog)
         menu.addAction(color_action)
 
+        frequency_menu = menu.addMenu('Frequency')
+        if not self.plotted_meas:
+            frequency_menu.setDisabled(True)
+        else:
+            # Frequencies of every plotted file, checked where a file currently shows one
+            shown = {float(meas.frequency) for meas in self.plotted_meas.values()}
+            for frequency in self.frequencies:
+                action = QAction(f'{frequency/1e9:.6g} GHz', self)
+                action.setCheckable(True)
+                action.setChecked(float(frequency) in shown)
+                action.triggered.connect(lambda checked, f=float(frequency): self.set_frequency(f))
+                frequency_menu.addAction(action)
+
 
         # Remove window
         menu.addSeparator()
@@ -189,11 +252,93 @@ class H5ANTWidget(QFrame):
         self.update_plot()
 
 
+    def selected_index(self, meas) -> int:
+        return -1 if self.frequency is None else meas.closest_frequency_index(self.frequency)
+
+    def set_frequency(self, frequency: float, update: bool = True) -> None:
+        # Swap the per-frequency views, the plotted lines pick them up in normalize. Files measured over
+        # different bands each select their own closest frequency.
+        self.frequency = frequency
+        for key, meas in self.plotted_meas.items():
+            self.plotted_meas[key] = meas.select(self.selected_index(meas))
+        self.extremes.reset((key, meas.peak, meas.floor) for key, meas in self.plotted_meas.items())
+        self.dirty = True
+        if update: self.tab_parent.global_update()
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        # Every frequency of the plotted files [Hz]
+        return np.unique(np.concatenate([meas.frequencies for meas in self.plotted_meas.values()] + [np.empty(0)]))
+
+    def frame_extremes(self, frequencies: np.ndarray) -> tuple[np.ndarray, np.ndarray] | None:
+        # Local (peak, floor) for every playback frequency, each file at its closest measured one
+        if not self.plotted_meas: return None
+        peaks = np.full(len(frequencies), -np.inf)
+        floors = np.full(len(frequencies), np.inf)
+        for meas in self.plotted_meas.values():
+            index = meas.closest_frequency_index(frequencies)
+            peaks = np.maximum(peaks, meas.powers.max(axis=0)[index])
+            floors = np.minimum(floors, meas.powers.min(axis=0)[index])
+        return peaks, floors
+
+    def start_animation(self, frequencies: np.ndarray, offsets: np.ndarray, ylim: tuple) -> None:
+        # Everything but the lines goes into a cached background, frames only redraw the lines
+        self.animation_offsets = offsets
+        self.animation_indices = {key: meas.closest_frequency_index(frequencies) for key, meas in self.plotted_meas.items()}
+
+        # Frames draw at most about two points per pixel of the plot circumference
+        bbox = self.ax.bbox
+        max_points = max(1, int(2*np.pi*min(bbox.width, bbox.height)))
+        n_angles = max((len(meas.angles_deg) for meas in self.plotted_meas.values()), default=1)
+        self.animation_stride = max(1, int(np.ceil(n_angles / max_points)))
+
+        for key, meas in self.plotted_meas.items():
+            line = self.plotted_files[key]
+            line.set_animated(True)
+            line.set_xdata(meas.angles_rad[::self.animation_stride])
+            line.set_ydata(meas.power[::self.animation_stride])
+        self.ax.set_ylim(*ylim, auto=False)
+        # Suspended canvases take the background in on_draw once they are resumed
+        if self.canvas_host.onscreen: self.canvas.draw()
+
+    def on_draw(self, event) -> None:
+        # Full draws (including resizes) refresh the background while animating
+        if self.animation_offsets is None: return
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_animated_lines()
+
+    def animate_frame(self, frame: int) -> None:
+        if self.background is None: return
+        for key, meas in self.plotted_meas.items():
+            power = meas.powers[::self.animation_stride, self.animation_indices[key][frame]]
+            self.plotted_files[key].set_ydata(power - self.animation_offsets[frame])
+        self.canvas.restore_region(self.background)
+        self.draw_animated_lines()
+        self.canvas.blit(self.ax.bbox)
+
+    def draw_animated_lines(self) -> None:
+        for line in self.plotted_files.values():
+            self.ax.draw_artist(line)
+
+    def stop_animation(self, frequency: float) -> None:
+        self.animation_offsets = None
+        self.animation_indices = {}
+        self.background = None
+        self.set_frequency(frequency, update=False)
+        for key, meas in self.plotted_meas.items():
+            line = self.plotted_files[key]
+            line.set_animated(False)
+            line.set_data(meas.angles_rad, meas.power) # Back to full resolution, normalize shifts it
+        self.ax.set_autoscaley_on(True)
+
+
     def remove_file(self, file_path):
         if file_path in self.plotted_files:
             self.plotted_meas.pop(file_path)
+            self.extremes.remove(file_path)
             line = self.plotted_files.pop(file_path)
             line.remove()  # Remove line from axes
+            self.dirty = True
             self.tab_parent.global_update()
 
 
@@ -214,6 +359,7 @@ class H5ANTWidget(QFrame):
     def prepare_for_update(self) -> None:
         self.determine_local_extremes()
 
+    @Tracing.traced('update_legend.h5ant')
     def update_legend(self) -> None:
         if not self.plotted_files: return
         if self.legend:
@@ -227,7 +373,13 @@ class H5ANTWidget(QFrame):
             self.legend = self.ax.legend()
         self.legend.set_draggable(True)
 
+    def on_resumed(self) -> None:
+        # Updates skipped while scrolled out of view. While animating the lines hold playback frames,
+        # the resumed canvas only needs its draw
+        if self.dirty and self.animation_offsets is None: self.update_plot()
+
     def update_plot(self) -> None:
         self.update_legend()
         self.normalize()
-        self.canvas.draw()
\ No newline at end of file
+        self.canvas.draw_idle()
+        self.dirty = False
\ No newline at end of file
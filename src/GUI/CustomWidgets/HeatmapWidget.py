@@ -0,0 +1,430 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QFrame, QDialog, QMenu, QProgressBar
+)
+
+from PySide6.QtCore import Qt, QPoint, QTimer, Signal
+from PySide6.QtGui import QAction
+from matplotlib.figure import Figure
+import matplotlib.gridspec as gridspec
+import numpy as np
+import os
+
+from dataclasses import dataclass
+
+from src.enums import Normalization
+from src.functions.pyramid import ResolutionPyramid
+from src.structs import MultiFrequencyMeasurement, measurement_cache
+from src.util import Logging, Path
+
+from .Dialogs import SaveFigureDialog
+from .Workers import BatchLoader
+from .TracedCanvas import TracedCanvas
+from .VirtualGrid import CanvasHost
+
+
+@dataclass
+class HeatmapData:
+    meas: MultiFrequencyMeasurement
+    pyramid: ResolutionPyramid
+    angle_edges: np.ndarray # deg, cell edges of the rows
+    frequency_edges: np.ndarray # Hz, cell edges of the columns
+    peak: float
+    floor: float
+
+
+def cell_edges(centers: np.ndarray) -> np.ndarray:
+    if len(centers) == 1: return np.array([centers[0] - .5, centers[0] + .5])
+    middle = (centers[1:] + centers[:-1]) / 2
+    return np.concatenate([[2*centers[0] - middle[0]], middle, [2*centers[-1] - middle[-1]]])
+
+
+def load_heatmap(file_path) -> HeatmapData:
+    # Runs on the loader pool, the pyramid is the expensive part and only built once per file
+    meas = measurement_cache.load(file_path)
+    angles, frequencies, powers = meas.angles_deg, meas.frequencies, meas.powers
+    if np.any(np.diff(angles) < 0):
+        order = np.argsort(angles)
+        angles, powers = angles[order], powers[order]
+    if np.any(np.diff(frequencies) < 0):
+        order = np.argsort(frequencies)
+        frequencies, powers = frequencies[order], powers[:, order]
+
+    pyramid = ResolutionPyramid(powers)
+    coarsest = pyramid.levels[-1][-1].data # Max-reduced, so its maximum is the peak of the whole matrix
+    return HeatmapData(
+        meas, pyramid, cell_edges(angles), cell_edges(frequencies),
+        float(coarsest.max()), float(np.min(powers)),
+    )
+
+
+def index_range(edges: np.ndarray, lo: float, hi: float) -> tuple[int, int]:
+    # Cells overlapping [lo, hi], at least one
+    start = max(int(np.searchsorted(edges, lo, side='right')) - 1, 0)
+    stop = min(int(np.searchsorted(edges, hi, side='left')), len(edges) - 1)
+    return start, max(stop, start + 1)
+
+
+def level_edges(edges: np.ndarray, span: tuple[int, int], factor: int) -> np.ndarray:
+    return edges[np.r_[np.arange(span[0], span[1], factor), span[1]]]
+
+
+class HeatmapWidget(QFrame):
+    '''The full angle x frequency powers matrix of one file, rectangular or polar.
+
+    Only a slice of the pyramid level matching the visible band and the axes size is drawn, so zooming stays
+    interactive on matrices with millions of cells. Clicking adds the frequency cut at that column to the polar
+    cut plot, shift-clicking adds the angle cut at that row to the frequency cut plot.
+    '''
+    # Signal emitted when this plot widget wants to be removed
+    remove_requested = Signal(QWidget)
+
+    def __init__(self, parent):
+        super().__init__()
+        self.setFrameShape(QFrame.StyledPanel)
+        self.layout = QVBoxLayout()
+        self.figure = Figure()
+        self.canvas = TracedCanvas(self.figure, 'heatmap')
+        self.grid = gridspec.GridSpec(2, 2, figure=self.figure, width_ratios=[3, 2])
+
+        self.polar = False
+        self.heat_ax = None
+        self.heat_artist = None
+        self.colorbar = None
+        self.marker = None
+        self.cut_ax = self.figure.add_subplot(self.grid[0, 1], projection='polar')
+        self.cut_ax.set_theta_zero_location("N")
+        self.row_ax = self.figure.add_subplot(self.grid[1, 1])
+        self.row_ax.set_xlabel('Frequency (GHz)')
+        self.cut_data = {} # cut line: raw powers, normalized in update_plot
+        self.create_heat_axes()
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat('Building pyramid...')
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.hide()
+
+        self.canvas_host = CanvasHost(self.canvas)
+        self.canvas_host.resumed.connect(self.on_resumed)
+        self.layout.addWidget(self.canvas_host)
+        self.layout.addWidget(self.progress_bar)
+        self.setLayout(self.layout)
+
+        self.setAcceptDrops(True)
+        self.plotted_files = {} # file_path: heatmap artist, a heatmap shows one file
+        self.plotted_meas = {} # file_path: MultiFrequencyMeasurement
+        self.data = None
+        self.frequency = None # Hz, marked at the closest measured frequency. None for the last one
+
+        # Heatmaps take no part in the tab extremes or frequency playback, besides moving the marker
+        self.peak = None
+        self.floor = None
+        self.animation_offsets = None
+        self.dirty = True
+        self.view_pending = False
+
+        # Enable context menu
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.open_context_menu)
+        self.canvas.mpl_connect('button_press_event', self.on_click)
+        self.canvas.mpl_connect('scroll_event', self.on_scroll)
+        self.canvas.mpl_connect('resize_event', lambda event: self.schedule_view())
+
+        self.tab_parent = parent
+        self.loader = BatchLoader(load_heatmap, self)
+        self.loader.file_loaded.connect(self.set_data)
+        self.loader.file_failed.connect(self.on_load_failed)
+
+        self.logger = Logging.get_logger('Heatmap Widget')
+
+    def create_heat_axes(self) -> None:
+        if self.colorbar is not None: self.colorbar.remove()
+        if self.heat_ax is not None: self.heat_ax.remove()
+        self.heat_artist = None
+        self.colorbar = None
+        self.marker = None
+
+        if self.polar:
+            self.heat_ax = self.figure.add_subplot(self.grid[:, 0], projection='polar')
+            self.heat_ax.set_theta_zero_location("N")
+        else:
+            self.heat_ax = self.figure.add_subplot(self.grid[:, 0])
+            self.heat_ax.set_xlabel('Frequency (GHz)')
+            self.heat_ax.set_ylabel('Angle (deg)')
+        self.heat_ax.set_autoscale_on(False) # Limits are the zoom, artists replaced on refresh must not move them
+        self.heat_ax.callbacks.connect('xlim_changed', lambda ax: self.schedule_view())
+        self.heat_ax.callbacks.connect('ylim_changed', lambda ax: self.schedule_view())
+
+
+    def dragEnterEvent(self, event):
+        # Accept external file drops
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        if event.mimeData().hasUrls():
+            for url in event.mimeData().urls():
+                file_path = url.toLocalFile()
+                if os.path.splitext(file_path)[1].lower() != '.h5ant': continue
+                if file_path in self.plotted_files: break
+                self.progress_bar.show()
+                self.loader.load([file_path]) # Only the first file, a heatmap shows one measurement
+                break
+            event.acceptProposedAction()
+
+    def on_load_failed(self, file_path, message) -> None:
+        self.progress_bar.hide()
+        self.logger.error(f"Failed to plot {file_path}: {message}")
+
+    def set_data(self, file_path, data: HeatmapData) -> None:
+        self.progress_bar.hide()
+        self.clear_cuts()
+        self.plotted_files = {file_path: None}
+        self.plotted_meas = {file_path: data.meas}
+        self.data = data
+        self.heat_ax.set_title(os.path.splitext(os.path.basename(file_path))[0])
+        self.logger.info(f'Built pyramid for {file_path} ({data.meas.powers.size} cells, {data.pyramid.nbytes/2**20:.1f} MiB)')
+        self.reset_zoom()
+        self.dirty = True
+        self.tab_parent.global_update()
+
+
+    @property
+    def offset(self) -> float:
+        # Value subtracted from the powers for the current normalization mode
+        if self.data is None: return 0.
+        match self.tab_parent.normalization_mode:
+            case Normalization.IGNORED: return 0.
+            case Normalization.LOCAL: return self.data.peak
+            case Normalization.GLOBAL:
+                peak = self.tab_parent.peak
+                return peak if np.isfinite(peak) else self.data.peak
+
+    def view_ranges(self) -> tuple[tuple[int, int], tuple[int, int]]:
+        # Visible (rows, columns) in base matrix indices
+        if self.polar:
+            rows = (0, len(self.data.angle_edges) - 1)
+            cols = index_range(self.data.frequency_edges, *np.array(self.heat_ax.get_ylim())*1e9)
+        else:
+            rows = index_range(self.data.angle_edges, *sorted(self.heat_ax.get_ylim()))
+            cols = index_range(self.data.frequency_edges, *np.array(sorted(self.heat_ax.get_xlim()))*1e9)
+        return rows, cols
+
+    def schedule_view(self) -> None:
+        # x and y limits usually change together, refresh once after both
+        if self.view_pending or self.data is None: return
+        self.view_pending = True
+        QTimer.singleShot(0, self.refresh_view)
+
+    def refresh_view(self) -> None:
+        self.view_pending = False
+        if self.data is None: return
+        if not self.canvas_host.onscreen:
+            self.dirty = True # Refreshed by on_resumed
+            return
+
+        # About one cell per pixel. Polar meshes draw every quad as a path, so they get a few per ring
+        # (about 2 px of circumference per cell) and fewer rings, keeping the mesh below ~100k quads.
+        bbox = self.heat_ax.bbox
+        size = min(bbox.width, bbox.height)
+        if self.polar: max_rows, max_cols = int(np.pi*size/2), int(size/8)
+        else: max_rows, max_cols = int(bbox.height), int(bbox.width)
+        rows, cols = self.view_ranges()
+        view = self.data.pyramid.view(rows, cols, max(max_rows, 1), max(max_cols, 1))
+        level = self.data.pyramid.levels[view.level[0]][view.level[1]]
+        values = view.data - self.offset
+
+        angle_edges = level_edges(self.data.angle_edges, view.rows, level.row_factor)
+        frequency_edges = level_edges(self.data.frequency_edges, view.cols, level.col_factor) / 1e9
+        if self.polar:
+            # Meshes cannot change shape, replace it (the limits are kept)
+            if self.heat_artist is not None: self.heat_artist.remove()
+            ylim = self.heat_ax.get_ylim()
+            self.heat_artist = self.heat_ax.pcolormesh(np.deg2rad(angle_edges), frequency_edges, values.T, shading='flat')
+            self.heat_ax.set_ylim(ylim, emit=False)
+        elif self.heat_artist is None:
+            self.heat_artist = self.heat_ax.imshow(values, origin='lower', aspect='auto', interpolation='nearest')
+        else:
+            self.heat_artist.set_data(values)
+        if not self.polar:
+            self.heat_artist.set_extent((frequency_edges[0], frequency_edges[-1], angle_edges[0], angle_edges[-1]))
+
+        self.heat_artist.set_clim(self.data.floor - self.offset, self.data.peak - self.offset)
+        if self.colorbar is None: self.colorbar = self.figure.colorbar(self.heat_artist, ax=self.heat_ax, label='Power (dB)')
+        else: self.colorbar.update_normal(self.heat_artist)
+        self.plotted_files = {key: self.heat_artist for key in self.plotted_files}
+        self.update_marker()
+        self.request_draw()
+
+    def reset_zoom(self) -> None:
+        if self.data is None: return
+        frequencies = self.data.frequency_edges[[0, -1]] / 1e9
+        if self.polar:
+            self.heat_ax.set_ylim(*frequencies, emit=False)
+        else:
+            self.heat_ax.set_xlim(*frequencies, emit=False)
+            self.heat_ax.set_ylim(*self.data.angle_edges[[0, -1]], emit=False)
+        self.refresh_view()
+
+    def on_scroll(self, event) -> None:
+        # Zoom around the cursor: frequency band (angles with shift held) in rectangular view, radius in polar
+        if event.inaxes is not self.heat_ax or self.data is None: return
+        scale = 0.8 if event.button == 'up' else 1.25
+        frequencies = self.data.frequency_edges[[0, -1]] / 1e9
+        if self.polar:
+            limits, bounds, center, setter = self.heat_ax.get_ylim(), frequencies, event.ydata, self.heat_ax.set_ylim
+        elif event.key == 'shift':
+            limits, bounds, center, setter = self.heat_ax.get_ylim(), self.data.angle_edges[[0, -1]], event.ydata, self.heat_ax.set_ylim
+        else:
+            limits, bounds, center, setter = self.heat_ax.get_xlim(), frequencies, event.xdata, self.heat_ax.set_xlim
+
+        lo = center - (center - limits[0]) * scale
+        hi = center + (limits[1] - center) * scale
+        setter(max(lo, bounds[0]), min(hi, bounds[1]))
+
+    def on_click(self, event) -> None:
+        if event.inaxes is not self.heat_ax or event.button != 1 or self.data is None: return
+        if self.polar: angle, frequency = np.rad2deg(event.xdata), event.ydata*1e9
+        else: angle, frequency = event.ydata, event.xdata*1e9
+
+        if event.key == 'shift': self.add_angle_cut(angle)
+        else: self.add_frequency_cut(frequency)
+
+    def add_frequency_cut(self, frequency: float) -> None:
+        meas = self.data.meas
+        index = meas.closest_frequency_index(frequency)
+        pattern = meas.pattern(index)
+        line, = self.cut_ax.plot(pattern.angles_rad, pattern.power - self.offset, label=f'{pattern.frequency/1e9:.4g} GHz')
+        self.cut_data[line] = pattern.power
+        self.cut_ax.legend(fontsize='small')
+        self.normalize_cuts()
+        self.request_draw()
+
+    def add_angle_cut(self, angle: float) -> None:
+        meas = self.data.meas
+        index = int(meas.angle_index.nearest(angle))
+        powers = np.asarray(meas.powers[index])
+        line, = self.row_ax.plot(meas.frequencies/1e9, powers - self.offset, label=f'{meas.angles_deg[index]:.1f} deg')
+        self.cut_data[line] = powers
+        self.row_ax.legend(fontsize='small')
+        self.normalize_cuts()
+        self.request_draw()
+
+    def clear_cuts(self) -> None:
+        for line in self.cut_data:
+            line.remove()
+        self.cut_data = {}
+        for ax in (self.cut_ax, self.row_ax):
+            if ax.get_legend() is not None: ax.get_legend().remove()
+        self.request_draw()
+
+    def normalize_cuts(self) -> None:
+        offset = self.offset
+        for line, powers in self.cut_data.items():
+            line.set_ydata(powers - offset)
+        for ax in (self.cut_ax, self.row_ax):
+            ax.relim()
+            ax.autoscale_view()
+
+    def update_marker(self) -> None:
+        # Current frequency of the tab, as a line (rectangular) or ring (polar)
+        if self.marker is not None: self.marker.remove()
+        self.marker = None
+        if self.data is None: return
+        meas = self.data.meas
+        index = -1 if self.frequency is None else meas.closest_frequency_index(self.frequency)
+        frequency = meas.frequencies[index] / 1e9
+        if self.polar:
+            self.marker, = self.heat_ax.plot(np.linspace(0, 2*np.pi, 361), np.full(361, frequency), color='white', linewidth=0.8)
+        else:
+            self.marker = self.heat_ax.axvline(frequency, color='white', linewidth=0.8)
+
+
+    def open_context_menu(self, pos: QPoint):
+        menu = QMenu(self)
+
+        polar_action = QAction('Polar view', self)
+        polar_action.setCheckable(True)
+        polar_action.setChecked(self.polar)
+        polar_action.triggered.connect(self.set_polar)
+        menu.addAction(polar_action)
+
+        reset_action = QAction('Reset zoom', self)
+        reset_action.setDisabled(self.data is None)
+        reset_action.triggered.connect(self.reset_zoom)
+        menu.addAction(reset_action)
+
+        clear_action = QAction('Clear cuts', self)
+        clear_action.setDisabled(not self.cut_data)
+        clear_action.triggered.connect(self.clear_cuts)
+        menu.addAction(clear_action)
+
+        # Remove window
+        menu.addSeparator()
+        remove_plot_action = QAction("Remove This Plot Window", self)
+        remove_plot_action.triggered.connect(lambda: self.remove_requested.emit(self))
+        menu.addAction(remove_plot_action)
+
+        # Save window
+        menu.addSeparator()
+        save_action = QAction('Save figure', self)
+        if self.data is None:
+            save_action.setDisabled(True)
+        else:
+            save_action.triggered.connect(self.save_figure)
+        menu.addAction(save_action)
+
+        menu.exec(self.mapToGlobal(pos))
+
+    def set_polar(self, polar: bool) -> None:
+        if polar == self.polar: return
+        self.polar = polar
+        title = self.heat_ax.get_title()
+        self.create_heat_axes()
+        self.heat_ax.set_title(title)
+        self.reset_zoom()
+
+    def save_figure(self) -> None:
+        dialog = SaveFigureDialog(self)
+
+        if dialog.exec() != QDialog.Accepted: return
+
+        file = f'{dialog.filename}.{dialog.extension}'
+        path = Path.join(Path.output_folder(), file)
+        self.figure.savefig(path, format=dialog.extension)
+        self.logger.info(f'Saved figure to {path}')
+
+
+    def set_frequency(self, frequency: float, update: bool = True) -> None:
+        self.frequency = frequency
+        self.dirty = True
+        if update: self.tab_parent.global_update()
+
+    @property
+    def frequencies(self) -> np.ndarray:
+        return np.empty(0) if self.data is None else self.data.meas.frequencies
+
+    def frame_extremes(self, frequencies: np.ndarray) -> None:
+        return None # Not animated, see animate_frame
+
+    def animate_frame(self, frame: int) -> None:
+        # Redrawing the heatmap every frame would slow down playback, the marker catches up when it stops
+        self.frequency = float(self.tab_parent.frequencies[frame])
+        self.dirty = True
+
+    def prepare_for_update(self) -> None:
+        pass # Heatmaps are normalized against the other plots, but do not move their extremes
+
+    def on_resumed(self) -> None:
+        # Updates skipped while scrolled out of view
+        if self.dirty: self.update_plot()
+
+    def request_draw(self) -> None:
+        # Suspended canvases keep their renderer released, on_resumed draws them instead
+        if self.canvas_host.onscreen: self.canvas.draw_idle()
+        else: self.dirty = True
+
+    def update_plot(self) -> None:
+        self.dirty = False
+        self.normalize_cuts()
+        self.refresh_view()
+        self.request_draw()
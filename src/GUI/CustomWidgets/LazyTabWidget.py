@@ -0,0 +1,49 @@
+from PySide6.QtWidgets import QTabWidget, QWidget, QVBoxLayout
+from PySide6.QtCore import QTimer, Signal
+
+from src.util import Logging
+
+import time
+
+
+class LazyTabWidget(QTabWidget):
+    '''Tab widget which only constructs a tab the first time it is shown.'''
+    tab_created = Signal(int, QWidget) # index, content
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.factories = {} # placeholder -> factory
+        self.contents = {} # placeholder -> constructed tab
+        self.currentChanged.connect(self.schedule_current)
+
+    def add_lazy_tab(self, factory, label: str) -> int:
+        placeholder = QWidget()
+        layout = QVBoxLayout(placeholder)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.factories[placeholder] = factory
+        return self.addTab(placeholder, label)
+
+    def content(self, index: int) -> QWidget | None:
+        return self.contents.get(self.widget(index))
+
+    def ensure_tab(self, index: int) -> QWidget | None:
+        placeholder = self.widget(index)
+        if placeholder is None: return None
+        if placeholder in self.contents: return self.contents[placeholder]
+
+        start = time.perf_counter()
+        content = self.factories.pop(placeholder)()
+        placeholder.layout().addWidget(content)
+        self.contents[placeholder] = content
+        Logging.get_logger('Tabs').info(f'Created {self.tabText(index)} tab in {time.perf_counter() - start:.2f} s')
+        self.tab_created.emit(index, content)
+        return content
+
+    def schedule_current(self, *args) -> None:
+        # Build after the event loop has painted the tab bar, so switching stays responsive.
+        # The first tab is built by the owner once the window is up (see ensure_current).
+        if not self.isVisible(): return
+        QTimer.singleShot(0, self.ensure_current)
+
+    def ensure_current(self) -> None:
+        self.ensure_tab(self.currentIndex())
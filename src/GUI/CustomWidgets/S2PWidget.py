@@ -1,26 +1,28 @@
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QFrame, QDialog, QMenu, QFormLayout,
-    QHBoxLayout, QCheckBox, QGroupBox, QSizePolicy, QLineEdit
+    QHBoxLayout, QCheckBox, QGroupBox, QSizePolicy, QLineEdit, QProgressBar
 )
 
 from PySide6.QtCore import Qt, QPoint, Signal
 from PySide6.QtGui import QAction, QDoubleValidator
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.gridspec as gridspec
-
-import skrf as rf
+from matplotlib.ticker import FuncFormatter
 
 import numpy as np
 import os
 
 
 from src.enums import SParameter, SParamPlotLines
-from src.structs import AntennaMeasurement
-from src.util import Logging, Path
+from src.functions.decimation import minmax_decimate, visible_slice
+from src.structs import SParameterMeasurement, load_sparameters
+from src.util import Logging, Path, Tracing
 
 from .Dialogs import RenameLineDialog, SaveFigureDialog, ColorDialog
+from .Workers import BatchLoader
+from .TracedCanvas import TracedCanvas
+from .VirtualGrid import CanvasHost
 
 
 class S2PWidget(QFrame):
@@ -65,7 +67,7 @@ class S2PWidget(QFrame):
 
         self.figure = Figure(figsize=(10, 6))
 
-        self.canvas = FigureCanvas(self.figure)
+        self.canvas = TracedCanvas(self.figure, 's2p')
         self.canvas.setMouseTracking(True)
         self.canvas.installEventFilter(self)
  
@@ -79,14 +81,30 @@ class S2PWidget(QFrame):
         # self.ax_smith.set_title('Smith Chart')
 
         self.ax_mag.grid()
+        self.ax_mag.set_xlabel('Frequency (GHz)')
+        self.ax_mag.set_ylabel('Magnitude (dB)')
+        self.ax_mag.xaxis.set_major_formatter(FuncFormatter(lambda x, pos: f'{x/1e9:g}'))
+
+        # Lines only hold a decimated copy sized to the axes, the full traces live here
+        self.trace_data = {} # mag line: (frequencies, magnitude dB)
+        self.ax_mag.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        self.canvas.mpl_connect('resize_event', lambda event: self.decimate_traces())
         # self.ax_phase.grid()
 
         self.legend = None
         self.bbox_to_anchor = None
+        self.dirty = True # Set by the tab for updates deferred while scrolled out of view
         self.loc = 'upper right'
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat('Loading %v/%m')
+        self.progress_bar.hide()
+
         self.layout.addWidget(self.settings_group)
-        self.layout.addWidget(self.canvas)
+        self.canvas_host = CanvasHost(self.canvas)
+        self.canvas_host.resumed.connect(self.on_resumed)
+        self.layout.addWidget(self.canvas_host)
+        self.layout.addWidget(self.progress_bar)
         self.setLayout(self.layout)
 
         self.setAcceptDrops(True)
@@ -103,6 +121,13 @@ class S2PWidget(QFrame):
 
         self.tab_parent = parent
 
+        self.loader = BatchLoader(load_sparameters, self)
+        self.loader.file_loaded.connect(self.add_sparameters)
+        self.loader.file_failed.connect(self.on_load_failed)
+        self.loader.progress.connect(self.on_load_progress)
+        self.loader.finished.connect(self.on_load_finished)
+        self.loaded_in_batch = False
+
         self.update_plot()
         self.logger = Logging.get_logger('s2p Widget')
 
@@ -115,42 +140,64 @@ class S2PWidget(QFrame):
 
     def dropEvent(self, event):
         if event.mimeData().hasUrls():
-            updated = False
+            file_paths = []
             for url in event.mimeData().urls():
                 file_path = url.toLocalFile()
                 ext = os.path.splitext(file_path)[1].lower()
-                if ext in ['.s2p']:
-                    if self.plot_file(file_path):
-                        updated = True
-            if updated:
-                self.tab_parent.global_update()
+                if ext in ['.s2p'] and file_path not in self.plotted_files:
+                    file_paths.append(file_path)
+            self.loader.load(file_paths)
             event.acceptProposedAction()
 
 
+    def on_load_progress(self, done: int, total: int) -> None:
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setVisible(done < total)
+
+    def on_load_failed(self, file_path, message) -> None:
+        self.logger.error(f"Failed to plot {file_path}: {message}")
+
+    def on_load_finished(self) -> None:
+        self.progress_bar.hide()
+        if not self.loaded_in_batch: return
+        self.loaded_in_batch = False
+        self.tab_parent.global_update()
+
+
     def plot_file(self, file_path) -> bool:
         if file_path in self.plotted_files:
             return False  # Already plotted
 
         try:
-            graph = rf.Network(file_path)
+            meas = load_sparameters(file_path)
+        except Exception as e:
+            self.logger.error(f"Failed to plot {file_path}: {e}")
+            return False
+        return self.add_sparameters(file_path, meas)
+
+    def add_sparameters(self, file_path, meas: SParameterMeasurement) -> bool:
+        if file_path in self.plotted_files:
+            return False
+
+        try:
             label = os.path.basename(file_path).strip('.s2p')
             plotted_lines = {}
             for s in SParameter:
-                before_mag = set(self.ax_mag.get_lines())
-                # before_phase = set(self.ax_phase.get_lines())
-                # before_smith = set(self.ax_smith.get_lines())
-                graph.plot_s_db(m=s.m, n=s.n, ax=self.ax_mag, label=f'{label}-{s.name}')
-                # graph.plot_s_deg(m=s.m, n=s.n, ax=self.ax_phase)
-                # graph.plot_s_smith(m=s.m, n=s.n, ax=self.ax_smith)
-                mag_line = [line for line in self.ax_mag.get_lines() if line not in before_mag][0]
-                # phase_line = [line for line in self.ax_phase.get_lines() if line not in before_phase][0]
-                # smith_line = [line for line in self.ax_smith.get_lines() if line not in before_smith][0]
+                x, y = np.asarray(meas.frequencies), meas.s_db(s)
+                mag_line, = self.ax_mag.plot(x, y, label=f'{label}-{s.name}')
+                self.trace_data[mag_line] = (x, y)
+                # phase_line, = self.ax_phase.plot(meas.frequencies, meas.s_deg(s))
                 color = mag_line.get_color()
                 # plotted_lines[s] = SParamPlotLines(mag_line, phase_line, smith_line, color)
                 plotted_lines[s] = SParamPlotLines(mag_line, None, None, color)
 
             self.plotted_lines[file_path] = plotted_lines
             self.plotted_files[file_path] = label
+            self.loaded_in_batch = True
+            self.dirty = True
+            # Show lines as they arrive, suspended canvases stay dirty until they are resumed
+            if self.loader.busy and self.canvas_host.onscreen: self.canvas.draw_idle()
             return True
         except Exception as e:
             self.logger.error(f"Failed to plot {file_path}: {e}")
@@ -266,6 +313,7 @@ class S2PWidget(QFrame):
     def prepare_for_update(self) -> None:
         return
 
+    @Tracing.traced('update_legend.s2p')
     def update_legend(self) -> None:
         if not self.plotted_files: return
 
@@ -345,11 +393,42 @@ class S2PWidget(QFrame):
                 else:
                     self.marker_lines[key][ax_key] = None
 
+            marker_input = self.freq_input_A if key == 'A' else self.freq_input_B
+            marker_input.setToolTip('' if freq is None else self.marker_readout(freq*1e9))
+
+    def decimate_traces(self, full_range: bool = False) -> None:
+        # About two points per horizontal pixel, taken from the full resolution traces
+        n_buckets = max(int(self.ax_mag.bbox.width), 1)
+        xmin, xmax = (-np.inf, np.inf) if full_range else self.ax_mag.get_xlim()
+        for line, (x, y) in self.trace_data.items():
+            visible = visible_slice(x, xmin, xmax)
+            line.set_data(*minmax_decimate(x[visible], y[visible], n_buckets))
+
+    def on_xlim_changed(self, ax) -> None:
+        self.decimate_traces()
+        if self.canvas_host.onscreen: self.canvas.draw_idle()
+
+    def marker_readout(self, frequency: float) -> str:
+        # Always read from the raw traces, the plotted lines are decimated
+        readings = []
+        for line, (x, y) in self.trace_data.items():
+            if not line.get_visible(): continue
+            readings.append(f'{line.get_label()}: {np.interp(frequency, x, y):.3f} dB')
+        return '\n'.join(readings)
+
     def update_axis(self) -> None:
+        # Envelope of the whole trace first, so the limits cover all of it, then zoom decimation
+        self.decimate_traces(full_range=True)
         self.ax_mag.relim(visible_only=True)
         self.ax_mag.autoscale_view()
+        self.decimate_traces()
+
+    def on_resumed(self) -> None:
+        # Updates skipped while scrolled out of view
+        if self.dirty: self.update_plot()
 
     def update_plot(self) -> None:
+        self.dirty = False
         self.update_plot_sparams()
         self.update_marker_lines()
         self.update_legend()
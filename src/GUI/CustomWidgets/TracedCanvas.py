@@ -0,0 +1,14 @@
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+
+from src.util import Tracing
+
+
+class TracedCanvas(FigureCanvasQTAgg):
+    '''Qt canvas recording every full redraw as a canvas.draw.<name> span.'''
+    def __init__(self, figure, name: str):
+        super().__init__(figure)
+        self.span_name = f'canvas.draw.{name}'
+
+    def draw(self) -> None:
+        with Tracing.span(self.span_name):
+            super().draw()
@@ -0,0 +1,108 @@
+from PySide6.QtWidgets import QWidget, QLabel, QStackedLayout, QScrollArea
+from PySide6.QtCore import QObject, QEvent, QRect, QTimer, Qt, Signal
+
+from collections import OrderedDict
+
+
+class CanvasHost(QWidget):
+    '''Holds a plot canvas, or a pixmap of its last frame while the plot is scrolled out of view.
+
+    Suspending drops the canvas' Agg buffer, resuming redraws it before it is shown again.
+    '''
+    resumed = Signal()
+
+    def __init__(self, canvas, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.placeholder = QLabel()
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        self.placeholder.setScaledContents(True)
+
+        self.stack = QStackedLayout(self)
+        self.stack.setContentsMargins(0, 0, 0, 0)
+        self.stack.addWidget(self.canvas)
+        self.stack.addWidget(self.placeholder)
+        self.onscreen = True
+
+    def suspend(self) -> None:
+        if not self.onscreen: return
+        self.onscreen = False
+        self.placeholder.setPixmap(self.canvas.grab())
+        self.stack.setCurrentWidget(self.placeholder)
+
+        # The renderer is the bulk of a canvas' memory. Matplotlib has no public way to release it, Agg canvases
+        # cache it next to the size it was made for and make a new one on the next draw once both are cleared
+        if hasattr(self.canvas, 'renderer') and hasattr(self.canvas, '_lastKey'):
+            self.canvas.renderer = None
+            self.canvas._lastKey = None
+
+    def resume(self) -> None:
+        if self.onscreen: return
+        self.onscreen = True
+        self.resumed.emit() # Owner brings its plot up to date
+        self.canvas.draw_idle() # Drawn by the canvas' own paint event before it first shows
+        self.stack.setCurrentWidget(self.canvas)
+        self.release_pixmap()
+
+    def release_pixmap(self) -> None:
+        self.placeholder.clear()
+
+
+class VirtualGrid(QObject):
+    '''Keeps live canvases only for the plot widgets inside (or near) the scroll area viewport.
+
+    widgets returns the current plot widgets, each with a canvas_host. Off-screen widgets keep a pixmap of
+    their last frame, only the max_pixmaps most recently hidden ones, so memory stays bounded.
+    '''
+    def __init__(self, scroll_area: QScrollArea, widgets, max_pixmaps: int = 12, margin: int = 100):
+        super().__init__(scroll_area)
+        self.scroll_area = scroll_area
+        self.widgets = widgets
+        self.max_pixmaps = max_pixmaps
+        self.margin = margin # px around the viewport which still count as visible
+        self.pixmaps = OrderedDict() # suspended widget: None, oldest first
+        self.pending = False
+
+        scroll_area.verticalScrollBar().valueChanged.connect(self.schedule)
+        scroll_area.horizontalScrollBar().valueChanged.connect(self.schedule)
+        scroll_area.viewport().installEventFilter(self)
+        scroll_area.widget().installEventFilter(self)
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() in (QEvent.Resize, QEvent.Show, QEvent.LayoutRequest): self.schedule()
+        return False
+
+    def schedule(self, *args) -> None:
+        # Coalesces scroll bursts and relayouts into one pass once the geometry has settled
+        if self.pending: return
+        self.pending = True
+        QTimer.singleShot(0, self.update_visibility)
+
+    def visible_rect(self) -> QRect:
+        viewport = self.scroll_area.viewport()
+        content = self.scroll_area.widget()
+        top_left = content.mapFrom(viewport, viewport.rect().topLeft())
+        rect = QRect(top_left, viewport.size())
+        return rect.adjusted(-self.margin, -self.margin, self.margin, self.margin)
+
+    def update_visibility(self) -> None:
+        self.pending = False
+        if self.scroll_area.widget() is None: return
+        visible = self.visible_rect() if self.scroll_area.isVisible() else QRect()
+        widgets = list(self.widgets())
+
+        for widget in widgets:
+            host = widget.canvas_host
+            if visible.intersects(widget.geometry()):
+                self.pixmaps.pop(widget, None)
+                host.resume()
+            elif host.onscreen:
+                host.suspend()
+                self.pixmaps[widget] = None
+
+        # Forget removed widgets, then drop the oldest pixmaps over budget
+        for widget in [widget for widget in self.pixmaps if widget not in widgets]:
+            self.pixmaps.pop(widget)
+        while len(self.pixmaps) > self.max_pixmaps:
+            widget, _ = self.pixmaps.popitem(last=False)
+            widget.canvas_host.release_pixmap()
@@ -0,0 +1,107 @@
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class LoadSignals(QObject):
+    loaded = Signal(str, object)
+    failed = Signal(str, str)
+
+
+class LoadTask(QRunnable):
+    def __init__(self, file_path, loader, signals: LoadSignals):
+        super().__init__()
+        self.file_path = file_path
+        self.loader = loader
+        self.signals = signals
+
+    def run(self) -> None:
+        try:
+            result = self.loader(self.file_path)
+        except Exception as e:
+            self.emit(self.signals.failed, str(e))
+            return
+        self.emit(self.signals.loaded, result)
+
+    def emit(self, signal, payload) -> None:
+        try:
+            signal.emit(self.file_path, payload)
+        except RuntimeError:
+            pass # Receiver was deleted while the file was loading
+
+
+class BatchLoader(QObject):
+    '''Parses files on a thread pool and reports back on the GUI thread.'''
+    file_loaded = Signal(str, object)
+    file_failed = Signal(str, str)
+    progress = Signal(int, int) # done, total
+    finished = Signal()
+
+    def __init__(self, loader, parent=None, pool: QThreadPool = None):
+        super().__init__(parent)
+        self.loader = loader
+        self.pool = pool if pool is not None else QThreadPool.globalInstance()
+        self.pending = set()
+        self.done = 0
+        self.total = 0
+
+        # One signal hub shared by all tasks, queued onto the thread owning this loader
+        self.signals = LoadSignals(self)
+        self.signals.loaded.connect(self.on_loaded)
+        self.signals.failed.connect(self.on_failed)
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.pending)
+
+    def load(self, file_paths) -> None:
+        new_paths = [path for path in file_paths if path not in self.pending]
+        if not new_paths: return
+
+        self.total += len(new_paths)
+        self.progress.emit(self.done, self.total)
+        for path in new_paths:
+            self.pending.add(path)
+            self.pool.start(LoadTask(path, self.loader, self.signals))
+
+    def on_loaded(self, file_path, result) -> None:
+        self.file_loaded.emit(file_path, result)
+        self.complete(file_path)
+
+    def on_failed(self, file_path, message) -> None:
+        self.file_failed.emit(file_path, message)
+        self.complete(file_path)
+
+    def complete(self, file_path) -> None:
+        self.pending.discard(file_path)
+        self.done += 1
+        self.progress.emit(self.done, self.total)
+        if self.pending: return
+
+        self.done = 0
+        self.total = 0
+        self.finished.emit()
+
+
+class TaskSignals(QObject):
+    progress = Signal(int, int) # done, total
+    finished = Signal(object)
+    failed = Signal(str)
+
+
+class BackgroundTask(QRunnable):
+    '''Runs function(*args, progress=callback) off the GUI thread, for long jobs with their own progress.'''
+    def __init__(self, function, *args, parent: QObject = None):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.signals = TaskSignals(parent)
+
+    def run(self) -> None:
+        try:
+            result = self.function(*self.args, progress=self.signals.progress.emit)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+    def start(self, pool: QThreadPool = None) -> None:
+        (pool if pool is not None else QThreadPool.globalInstance()).start(self)
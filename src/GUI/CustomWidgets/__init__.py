@@ -1,3 +1,20 @@
-from .H5ANTWidget import H5ANTWidget
-from .FileExplorer import FileExplorer
-from .S2PWidget import S2PWidget
\ No newline at end of file
+# Widgets are imported on first access so the plotting widgets only load matplotlib when used
+import importlib
+
+_modules = {
+    'H5ANTWidget': '.H5ANTWidget',
+    'FileExplorer': '.FileExplorer',
+    'S2PWidget': '.S2PWidget',
+    'BatchLoader': '.Workers',
+    'LazyTabWidget': '.LazyTabWidget',
+    'HeatmapWidget': '.HeatmapWidget',
+}
+
+__all__ = list(_modules)
+
+
+def __getattr__(name):
+    if name not in _modules: raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_modules[name], __name__), name)
+    globals()[name] = value
+    return value
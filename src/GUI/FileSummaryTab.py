@@ -5,7 +5,7 @@ import os
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-from src.structs import AntennaMeasurement
+from src.structs import MultiFrequencyMeasurement, measurement_cache
 from src.util import Logging
 
 class PlotPreview(QFrame):
@@ -27,7 +27,7 @@ class PlotPreview(QFrame):
         self.tab_parent = parent
         self.current_line = None
 
-    def plot(self, meas: AntennaMeasurement) -> None:
+    def plot(self, meas: MultiFrequencyMeasurement) -> None:
         
         if self.current_line is not None:
             self.current_line.remove()
@@ -105,7 +105,7 @@ class FileSummaryTab(QWidget):
         
         self.info_label.setText(f"Measurement file selected: {file_path}")
         try:
-            meas = AntennaMeasurement.from_file(file_path)
+            meas = measurement_cache.load(file_path)
         except Exception as e:
             self.logger.error(f'Error reading file: {e}')
             self.current_meas = None
@@ -1,22 +1,31 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QScrollArea, QGridLayout, QGroupBox, QComboBox,
-    QHBoxLayout, QLabel, QFormLayout, QSpinBox
+    QHBoxLayout, QLabel, QFormLayout, QSpinBox, QSlider, QDialog, QProgressBar
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal, QTimer
 
-from src.GUI.CustomWidgets import H5ANTWidget
+from src.GUI.CustomWidgets import H5ANTWidget, HeatmapWidget
+from src.GUI.CustomWidgets.Dialogs import ExportDialog
+from src.GUI.CustomWidgets.Workers import BackgroundTask
+from src.GUI.CustomWidgets.VirtualGrid import VirtualGrid
 from src.enums import Normalization
-from src.util import Logging
+from src.structs import ExtremesTracker
+from src.util import Logging, Tracing
 import numpy as np
 
 class H5ANTTab(QWidget):
     description = 'h5ant'
+    # Emitted with (peak, floor) only when the extremes across all plots actually move
+    extremes_changed = Signal(float, float)
+
     def __init__(self):
         super().__init__()
         self.layout = QVBoxLayout()
 
         self.add_button = QPushButton("Add Plot Window")
-        self.add_button.clicked.connect(self.add_plot)
+        self.add_button.clicked.connect(lambda: self.add_plot(H5ANTWidget))
+        self.add_heatmap_button = QPushButton("Add Heatmap Window")
+        self.add_heatmap_button.clicked.connect(lambda: self.add_plot(HeatmapWidget))
 
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
@@ -51,9 +60,48 @@ class H5ANTTab(QWidget):
         columns_layout.addWidget(self.columns_spinbox)
         columns_widget.setLayout(columns_layout)
 
+        self.frequency_slider = QSlider(Qt.Horizontal)
+        self.frequency_slider.setRange(0, 0)
+        self.frequency_slider.valueChanged.connect(self.update_frequency)
+        self.frequency_label = QLabel('-')
+        self.frequencies = np.empty(0) # every plotted frequency [Hz], the slider steps through them
+        self.frequency = None # selected with the slider [Hz], None until it is first moved
+        self.play_button = QPushButton('Play')
+        self.play_button.setCheckable(True)
+        self.play_button.toggled.connect(self.toggle_playback)
+        self.play_timer = QTimer(self)
+        self.play_timer.setInterval(1000 // 30)
+        self.play_timer.timeout.connect(self.advance_frame)
+        frequency_widget = QWidget()
+        frequency_layout = QHBoxLayout()
+        frequency_layout.addWidget(QLabel('Frequency:'))
+        frequency_layout.addWidget(self.frequency_slider)
+        frequency_layout.addWidget(self.frequency_label)
+        frequency_layout.addWidget(self.play_button)
+        frequency_widget.setLayout(frequency_layout)
+
         self.settings_layout.addWidget(normalization_widget)
         self.settings_layout.addWidget(columns_widget)
-        self.settings_layout.addWidget(self.add_button)
+        self.export_button = QPushButton('Export figures...')
+        self.export_button.clicked.connect(self.export_figures)
+        self.export_progress = QProgressBar()
+        self.export_progress.setFormat('Exporting %v/%m files')
+        self.export_progress.hide()
+        self.export_task = None
+        export_widget = QWidget()
+        export_layout = QHBoxLayout()
+        export_layout.addWidget(self.export_button)
+        export_layout.addWidget(self.export_progress)
+        export_widget.setLayout(export_layout)
+
+        self.settings_layout.addWidget(frequency_widget)
+        add_widget = QWidget()
+        add_layout = QHBoxLayout()
+        add_layout.addWidget(self.add_button)
+        add_layout.addWidget(self.add_heatmap_button)
+        add_widget.setLayout(add_layout)
+        self.settings_layout.addWidget(add_widget)
+        self.settings_layout.addWidget(export_widget)
         self.settings_group.setLayout(self.settings_layout)
 
         self.plot_area = QWidget()
@@ -67,13 +115,16 @@ class H5ANTTab(QWidget):
         self.setLayout(self.layout)
 
         self.plot_widgets = []
+        self.virtual_grid = VirtualGrid(self.scroll_area, lambda: self.plot_widgets)
+        self.extremes = ExtremesTracker() # widget: (peak, floor)
+        self.extremes_changed.connect(self.on_extremes_changed)
         self.setAcceptDrops(True)
 
         self.logger = Logging.get_logger('h5ant Tab')
 
 
-    def add_plot(self):
-        plot_widget = H5ANTWidget(self)
+    def add_plot(self, widget_type=H5ANTWidget):
+        plot_widget = widget_type(self)
         plot_widget.setMinimumSize(400, 300)
         plot_widget.remove_requested.connect(self.remove_plot)
 
@@ -83,6 +134,7 @@ class H5ANTTab(QWidget):
 
         self.grid_layout.addWidget(plot_widget, row, col)
         self.plot_widgets.append(plot_widget)
+        self.virtual_grid.schedule()
         self.logger.info('Created new plot')
 
 
@@ -91,6 +143,7 @@ class H5ANTTab(QWidget):
             index = self.plot_widgets.index(plot_widget)
             # Remove widget from layout and list
             self.plot_widgets.pop(index)
+            if self.extremes.remove(plot_widget): self.extremes_changed.emit(self.peak, self.floor)
             self.grid_layout.removeWidget(plot_widget)
             plot_widget.deleteLater()
             self.relayout_grid()
@@ -111,6 +164,7 @@ class H5ANTTab(QWidget):
             row = idx // self.columns
             col = idx % self.columns
             self.grid_layout.addWidget(widget, row, col)
+        self.virtual_grid.schedule()
 
     def handle_reorder(self, source_id, target_id):
         source_index = None
@@ -132,18 +186,163 @@ class H5ANTTab(QWidget):
         # Update layout
         self.relayout_grid()
 
+    @Tracing.traced('global_update.h5ant')
     def global_update(self) -> None:
+        if self.play_timer.isActive():
+            # Playback keeps its own normalization, stopping it runs the update
+            self.play_button.setChecked(False)
+            return
+        self.update_frequency_range()
+
         for plot in self.plot_widgets:
             plot.prepare_for_update() # Prepare for plotting (update extremes etc)
 
+        updated = deferred = 0
         for plot in self.plot_widgets:
+            if not plot.dirty: continue
+            if not plot.canvas_host.onscreen:
+                deferred += 1 # Stays dirty, updated when scrolled into view
+                continue
             plot.update_plot() # Perform plot update
-        self.logger.info('Performed global plot update')
+            updated += 1
+        self.logger.info(f'Performed global plot update ({updated}/{len(self.plot_widgets)} plots redrawn, {deferred} deferred)')
+
+    def update_frequency_range(self) -> None:
+        # Files measured over different bands share one axis, each plot shows its closest frequencies
+        self.frequencies = np.unique(np.concatenate([plot.frequencies for plot in self.plot_widgets] + [np.empty(0)]))
+        self.frequency_slider.blockSignals(True)
+        self.frequency_slider.setRange(0, max(len(self.frequencies) - 1, 0))
+        if self.frequency is not None and len(self.frequencies):
+            self.frequency_slider.setValue(int(np.argmin(np.abs(self.frequencies - self.frequency))))
+        self.frequency_slider.blockSignals(False)
+        self.update_frequency_label(self.frequency_slider.value())
+
+    def update_frequency_label(self, frame: int) -> None:
+        if not len(self.frequencies):
+            self.frequency_label.setText('-')
+            return
+        self.frequency_label.setText(f'{self.frequencies[frame]/1e9:.4f} GHz')
+
+    def update_frequency(self, frame: int) -> None:
+        self.update_frequency_label(frame)
+        if not len(self.frequencies): return
+        self.frequency = float(self.frequencies[frame])
+        if self.play_timer.isActive():
+            for plot in self.plot_widgets:
+                if plot.canvas_host.onscreen: plot.animate_frame(frame)
+            return
+
+        for plot in self.plot_widgets:
+            plot.set_frequency(self.frequency, update=False)
+        self.global_update()
+
+    def toggle_playback(self, play: bool) -> None:
+        if play == self.play_timer.isActive(): return
+        if play: self.start_playback()
+        else: self.stop_playback()
+
+    def start_playback(self) -> None:
+        n_frames = len(self.frequencies)
+        extremes = {plot: plot.frame_extremes(self.frequencies) for plot in self.plot_widgets}
+        extremes = {plot: value for plot, value in extremes.items() if value is not None}
+        if n_frames < 2 or not extremes:
+            self.play_button.setChecked(False)
+            return
+
+        # Normalization for every frame is known up front, so frames only shift the lines
+        global_peaks = np.max([peaks for peaks, _ in extremes.values()], axis=0)
+        global_floors = np.min([floors for _, floors in extremes.values()], axis=0)
+        for plot, (peaks, floors) in extremes.items():
+            match self.normalization_mode:
+                case Normalization.IGNORED: offsets = np.zeros(n_frames)
+                case Normalization.LOCAL: offsets = peaks
+                case Normalization.GLOBAL: offsets = global_peaks
+
+            if self.normalization_mode == Normalization.GLOBAL:
+                ylim = (global_floors.min(), 0)
+            else:
+                ylim = ((floors - offsets).min(), (peaks - offsets).max())
+            plot.start_animation(self.frequencies, offsets, ylim)
+
+        self.play_button.setText('Pause')
+        self.play_timer.start()
+        self.logger.info(f'Started frequency playback over {n_frames} frequencies')
+
+    def stop_playback(self) -> None:
+        self.play_timer.stop()
+        self.play_button.setText('Play')
+        frequency = float(self.frequencies[self.frequency_slider.value()])
+        for plot in self.plot_widgets:
+            if plot.animation_offsets is None: continue
+            plot.stop_animation(frequency)
+        self.global_update()
+
+    def advance_frame(self) -> None:
+        frame = (self.frequency_slider.value() + 1) % (self.frequency_slider.maximum() + 1)
+        self.frequency_slider.setValue(frame)
+
+    def export_figures(self) -> None:
+        plotted = list(dict.fromkeys(path for plot in self.plot_widgets for path in plot.plotted_files))
+        dialog = ExportDialog(plotted, self)
+        if dialog.exec() != QDialog.Accepted: return
+
+        from src.export import export_figures, PlotTemplate
+        template = PlotTemplate(
+            normalization=self.normalization_mode,
+            frequencies=dialog.frequencies,
+            formats=dialog.formats,
+        )
+        self.export_task = BackgroundTask(export_figures, dialog.file_paths, template, parent=self)
+        self.export_task.signals.progress.connect(self.on_export_progress)
+        self.export_task.signals.finished.connect(self.on_export_finished)
+        self.export_task.signals.failed.connect(self.on_export_failed)
+
+        self.export_button.setEnabled(False)
+        self.export_progress.setRange(0, len(dialog.file_paths))
+        self.export_progress.setValue(0)
+        self.export_progress.show()
+        self.logger.info(f'Exporting {len(dialog.file_paths)} files')
+        self.export_task.start()
+
+    def on_export_progress(self, done: int, total: int) -> None:
+        self.export_progress.setRange(0, total)
+        self.export_progress.setValue(done)
+
+    def on_export_finished(self, result) -> None:
+        self.finish_export()
+        for path, message in result.failed.items():
+            self.logger.error(f'Failed to export {path}: {message}')
+
+    def on_export_failed(self, message: str) -> None:
+        self.finish_export()
+        self.logger.error(f'Export failed: {message}')
+
+    def finish_export(self) -> None:
+        self.export_task.signals.deleteLater()
+        self.export_task = None
+        self.export_button.setEnabled(True)
+        self.export_progress.hide()
+
+    def update_widget_extremes(self, plot_widget) -> None:
+        if plot_widget.peak is None:
+            changed = self.extremes.remove(plot_widget)
+        else:
+            changed = self.extremes.add(plot_widget, plot_widget.peak, plot_widget.floor)
+        if changed: self.extremes_changed.emit(self.peak, self.floor)
+
+    def on_extremes_changed(self, peak: float, floor: float) -> None:
+        # Clean widgets only need a render when they are normalized against the extremes that moved
+        if self.normalization_mode == Normalization.GLOBAL: self.mark_all_dirty()
+
+    def mark_all_dirty(self) -> None:
+        for plot in self.plot_widgets:
+            plot.dirty = True
 
     def update_normalization_mode(self, *args, **kwargs) -> None:
         from_mode = self.normalization_mode
         self.normalization_mode = self.normalization_mode_selector.currentData(Qt.UserRole)
         self.logger.info(f'Updated normalization mode from {from_mode.name} to {self.normalization_mode.name}')
+        self.mark_all_dirty()
         self.global_update()
 
     def update_columns(self, value: int) -> None:
@@ -152,16 +351,8 @@ class H5ANTTab(QWidget):
 
     @property
     def peak(self) -> float:
-        peak = -np.inf
-        for plot in self.plot_widgets:
-            if plot.peak is None: continue
-            if plot.peak > peak: peak = plot.peak
-        return peak
+        return -np.inf if self.extremes.peak is None else self.extremes.peak
     
     @property
     def floor(self) -> float:
-        floor = np.inf
-        for plot in self.plot_widgets:
-            if plot.floor is None: continue
-            if plot.floor < floor: floor = plot.floor
-        return floor
\ No newline at end of file
+        return np.inf if self.extremes.floor is None else self.extremes.floor
\ No newline at end of file
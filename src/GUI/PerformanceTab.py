@@ -0,0 +1,85 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QLabel
+)
+from PySide6.QtCore import Qt, QTimer
+
+from src.util import Logging, Tracing
+
+
+class PerformanceTab(QWidget):
+    '''Rolling timings of the traced steps, slowest total first.'''
+    description = 'Performance'
+    COLUMNS = ('Span', 'Count', 'Total [ms]', 'Mean [ms]', 'p50 [ms]', 'p90 [ms]', 'p99 [ms]', 'Max [ms]')
+    KEYS = ('count', 'total', 'mean', 'p50', 'p90', 'p99', 'max')
+
+    def __init__(self, interval_ms: int = 1000):
+        super().__init__()
+        self.logger = Logging.get_logger(self.description)
+        self.layout = QVBoxLayout()
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.dump_button = QPushButton('Dump Chrome Trace')
+        self.dump_button.clicked.connect(self.dump_trace)
+        self.log_button = QPushButton('Log Summary')
+        self.log_button.clicked.connect(Tracing.log_summary)
+        self.reset_button = QPushButton('Reset')
+        self.reset_button.clicked.connect(self.reset)
+        self.status_label = QLabel()
+        buttons.addWidget(self.dump_button)
+        buttons.addWidget(self.log_button)
+        buttons.addWidget(self.reset_button)
+        buttons.addWidget(self.status_label, 1)
+        self.layout.addLayout(buttons)
+        self.setLayout(self.layout)
+
+        # Only refreshed while the tab is shown
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event) -> None:
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self) -> None:
+        stats = sorted(Tracing.stats().items(), key=lambda item: -item[1]['total'])
+        self.table.setRowCount(len(stats))
+        for row, (name, values) in enumerate(stats):
+            self.set_item(row, 0, name)
+            for column, key in enumerate(self.KEYS, start=1):
+                value = values[key]
+                self.set_item(row, column, str(value) if key == 'count' else f'{value:.1f}')
+
+    def set_item(self, row: int, column: int, text: str) -> None:
+        item = self.table.item(row, column)
+        if item is None:
+            item = QTableWidgetItem()
+            if column: item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            self.table.setItem(row, column, item)
+        item.setText(text)
+
+    def dump_trace(self) -> None:
+        try:
+            path = Tracing.dump_chrome_trace()
+        except OSError as e:
+            self.logger.error(f'Failed to write trace: {e}')
+            self.status_label.setText('Failed to write trace')
+            return
+        self.status_label.setText(f'Wrote {path}')
+
+    def reset(self) -> None:
+        Tracing.reset()
+        self.status_label.clear()
+        self.refresh()
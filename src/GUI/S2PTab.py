@@ -5,8 +5,9 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 
 from src.GUI.CustomWidgets import S2PWidget
+from src.GUI.CustomWidgets.VirtualGrid import VirtualGrid
 from src.enums import Normalization
-from src.util import Logging
+from src.util import Logging, Tracing
 import numpy as np
 
 class S2PTab(QWidget):
@@ -52,6 +53,7 @@ class S2PTab(QWidget):
         self.setLayout(self.layout)
 
         self.plot_widgets = []
+        self.virtual_grid = VirtualGrid(self.scroll_area, lambda: self.plot_widgets)
         self.setAcceptDrops(True)
 
         self.logger = Logging.get_logger('s2p Tab')
@@ -68,6 +70,7 @@ class S2PTab(QWidget):
 
         self.grid_layout.addWidget(plot_widget, row, col)
         self.plot_widgets.append(plot_widget)
+        self.virtual_grid.schedule()
         self.logger.info('Created new plot')
 
 
@@ -96,6 +99,7 @@ class S2PTab(QWidget):
             row = idx // self.columns
             col = idx % self.columns
             self.grid_layout.addWidget(widget, row, col)
+        self.virtual_grid.schedule()
 
     def handle_reorder(self, source_id, target_id):
         source_index = None
@@ -122,10 +126,16 @@ class S2PTab(QWidget):
         self.relayout_grid()
 
 
+    @Tracing.traced('global_update.s2p')
     def global_update(self) -> None:
         for plot in self.plot_widgets:
             plot.prepare_for_update() # Prepare for plotting (update extremes etc)
 
+        deferred = 0
         for plot in self.plot_widgets:
+            plot.dirty = True
+            if not plot.canvas_host.onscreen:
+                deferred += 1 # Updated when scrolled into view
+                continue
             plot.update_plot() # Perform plot update
-        self.logger.info('Performed global plot update')
\ No newline at end of file
+        self.logger.info(f'Performed global plot update ({deferred} deferred)')
\ No newline at end of file
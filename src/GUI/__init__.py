@@ -1,7 +1,20 @@
-from .H5ANTTab import H5ANTTab
+# Tabs are imported on first access, most of them pull in matplotlib which dominates startup
+import importlib
 
-from .FileSummaryTab import FileSummaryTab
+_modules = {
+    'H5ANTTab': '.H5ANTTab',
+    'FileSummaryTab': '.FileSummaryTab',
+    'S2PTab': '.S2PTab',
+    'PerformanceTab': '.PerformanceTab',
+    'FileExplorer': '.CustomWidgets',
+    'LazyTabWidget': '.CustomWidgets',
+}
 
-from .CustomWidgets import FileExplorer
+__all__ = list(_modules)
 
-from .S2PTab import S2PTab
\ No newline at end of file
+
+def __getattr__(name):
+    if name not in _modules: raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_modules[name], __name__), name)
+    globals()[name] = value
+    return value
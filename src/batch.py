@@ -0,0 +1,178 @@
+# Headless batch metrics for whole measurement campaigns, e.g.
+#   python -m src.batch data/ --format json --workers 8
+# Walks the given folders for .h5ant and .s2p files, computes metrics on a process pool and writes CSV or JSON.
+# Nothing here (or in what it imports) may pull in PySide6, this runs on machines without a display.
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import multiprocessing as mp
+
+from src.functions.metrics import pattern_metrics, METRICS_DTYPE
+from src.functions.sparameters import sparameter_figures
+from src.structs.data import MultiFrequencyMeasurement, SParameterMeasurement
+from src.util import Logging, Path
+
+EXTENSIONS = {'.h5ant': 'h5ant', '.s2p': 's2p'}
+
+
+def find_files(roots) -> list[str]:
+    files = []
+    for root in roots:
+        if os.path.isfile(root):
+            files.append(os.path.abspath(root))
+            continue
+        for folder, dirs, names in os.walk(root):
+            dirs.sort()
+            files.extend(os.path.abspath(os.path.join(folder, name)) for name in sorted(names)
+                         if os.path.splitext(name)[1].lower() in EXTENSIONS)
+    return files
+
+
+def h5ant_rows(path, options) -> list[dict]:
+    if options['cache']:
+        from src.structs.sidecar import load_measurement
+        meas = load_measurement(path)
+    else:
+        meas = MultiFrequencyMeasurement.from_file(path)
+
+    metrics = pattern_metrics(meas.angles_deg, meas.powers, options['level_db'])
+    metrics['frequency'] = meas.frequencies
+    if options['frequency'] is not None: metrics = metrics[[options['frequency']]]
+
+    names = [name for name in METRICS_DTYPE.names if name != 'measurement']
+    return [{'file': path, **{name: row[name].item() for name in names}} for row in metrics]
+
+
+def s2p_rows(path, options) -> list[dict]:
+    if options['cache']:
+        from src.structs.sidecar import load_sparameters
+        meas = load_sparameters(path)
+    else:
+        meas = SParameterMeasurement.from_file(path)
+    figures = sparameter_figures(meas.frequencies, meas.s, options['return_loss_db'])
+    return [{'file': path, 'z0': meas.z0, **figures}]
+
+
+def process_file(job) -> tuple[str, str, list[dict], str | None]:
+    # Runs in the worker processes, so errors are returned rather than raised to keep the pool going
+    path, options = job
+    kind = EXTENSIONS[os.path.splitext(path)[1].lower()]
+    try:
+        rows = h5ant_rows(path, options) if kind == 'h5ant' else s2p_rows(path, options)
+    except Exception as e:
+        return path, kind, [], f'{type(e).__name__}: {e}'
+    return path, kind, rows, None
+
+
+def run(files, options, workers) -> tuple[dict, list[dict]]:
+    results = {kind: [] for kind in EXTENSIONS.values()}
+    errors = []
+    jobs = [(path, options) for path in files]
+
+    logger = Logging.get_logger('Batch')
+    if workers > 1 and len(jobs) > 1:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with mp.Pool(workers) as pool:
+            outputs = pool.imap_unordered(process_file, jobs, chunksize)
+            outputs = list(log_progress(outputs, len(jobs), logger))
+    else:
+        outputs = list(log_progress(map(process_file, jobs), len(jobs), logger))
+
+    # Workers finish in any order, sort so repeated runs give identical files
+    for path, kind, rows, error in sorted(outputs, key=lambda output: output[0]):
+        if error is not None:
+            logger.error(f'{path}: {error}')
+            errors.append({'file': path, 'error': error})
+        results[kind].extend(rows)
+    return results, errors
+
+
+def log_progress(outputs, total, logger, every=5.):
+    last = time.perf_counter()
+    for done, output in enumerate(outputs, start=1):
+        yield output
+        now = time.perf_counter()
+        if now - last >= every or done == total:
+            logger.info(f'Processed {done}/{total} files')
+            last = now
+
+
+def write_csv(output, results) -> list[str]:
+    # One table per file type, the columns differ
+    stem, _ = os.path.splitext(output)
+    written = []
+    for kind, rows in results.items():
+        if not rows: continue
+        path = f'{stem}_{kind}.csv'
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        written.append(path)
+    return written
+
+
+def write_json(output, results, errors) -> list[str]:
+    with open(output, 'w') as f:
+        # nan is not valid JSON, write null instead
+        json.dump(replace_nan({**results, 'errors': errors}), f, indent=2)
+    return [output]
+
+
+def replace_nan(value):
+    if isinstance(value, float) and value != value: return None
+    if isinstance(value, dict): return {key: replace_nan(item) for key, item in value.items()}
+    if isinstance(value, list): return [replace_nan(item) for item in value]
+    return value
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m src.batch', description='Compute metrics for every .h5ant and .s2p file under the given paths.')
+    parser.add_argument('paths', nargs='+', help='folders to walk, or individual files')
+    parser.add_argument('-o', '--output', help='output file, defaults to metrics.<format> in the output folder. CSV writes <stem>_h5ant.csv and <stem>_s2p.csv')
+    parser.add_argument('-f', '--format', choices=('csv', 'json'), help='defaults to the output extension, else csv')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1, help='worker processes (default: all cores)')
+    parser.add_argument('--frequency', type=int, default=None, help='only report this frequency index of .h5ant files (default: all)')
+    parser.add_argument('--level-db', type=float, default=3., help='beamwidth level below the peak (default: 3)')
+    parser.add_argument('--return-loss-db', type=float, default=10., help='return loss defining the matched band (default: 10)')
+    parser.add_argument('--cache', action='store_true', help='use and fill the sidecar cache in the cache folder')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    Logging.setup_logging(log_folder=Path.debug_folder())
+    logger = Logging.get_logger('Batch')
+
+    output_format = args.format
+    if output_format is None:
+        output_format = 'json' if args.output and args.output.lower().endswith('.json') else 'csv'
+    output = args.output or Path.join(Path.output_folder(), f'metrics.{output_format}')
+    Path.verify_existance(os.path.dirname(os.path.abspath(output)))
+
+    files = find_files(args.paths)
+    if not files:
+        logger.error(f'No .h5ant or .s2p files found under {", ".join(args.paths)}')
+        return 1
+
+    options = {
+        'frequency': args.frequency,
+        'level_db': args.level_db,
+        'return_loss_db': args.return_loss_db,
+        'cache': args.cache,
+    }
+    start = time.perf_counter()
+    logger.info(f'Processing {len(files)} files with {args.workers} workers')
+    results, errors = run(files, options, max(1, args.workers))
+
+    written = write_json(output, results, errors) if output_format == 'json' else write_csv(output, results)
+    logger.info(f'Wrote {", ".join(written) or "nothing"} in {time.perf_counter() - start:.1f} s ({len(errors)} failed)')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
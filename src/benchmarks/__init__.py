@@ -0,0 +1 @@
+from .synthetic import write_h5ant, write_s2p
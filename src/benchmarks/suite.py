@@ -0,0 +1,228 @@
+# Benchmarks on synthetic files, e.g.
+#   python -m src.benchmarks --h5ant 360x100 3600x10000 --s2p 100000 --baseline output/benchmark_old.json
+# Times loading, metrics, normalization and offscreen rendering, and writes the results to JSON so runs of
+# different versions can be compared.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from src.functions.metrics import batch_metrics
+from src.functions.sparameters import sparameter_figures
+from src.structs.data import MultiFrequencyMeasurement, SParameterMeasurement
+from src.util import Logging, Path, Tracing
+
+from .synthetic import write_h5ant, write_s2p
+
+RENDER_SIZE = (800, 600) # px, canvas size of the rendering benchmarks
+
+
+def measure(function, repeat: int, calls: int = 1) -> dict:
+    '''Seconds of repeat calls of function, the first one included. calls divides each run into steps.'''
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append((time.perf_counter() - start) / calls)
+    return {'min': min(runs), 'median': statistics.median(runs), 'max': max(runs), 'runs': runs}
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    try:
+        n_angles, n_frequencies = (int(value) for value in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected ANGLESxFREQUENCIES, got {text!r}')
+    return n_angles, n_frequencies
+
+
+def application():
+    # Offscreen regardless of the session, rendering times should not depend on a display
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+def render_h5ant(path, meas: MultiFrequencyMeasurement, repeat: int) -> dict:
+    from src.GUI.H5ANTTab import H5ANTTab
+    from src.GUI.CustomWidgets import H5ANTWidget
+
+    app = application()
+    tab = H5ANTTab()
+    widget = H5ANTWidget(tab)
+    widget.resize(*RENDER_SIZE)
+    widget.show()
+    app.processEvents()
+    widget.add_measurement(path, meas)
+    widget.prepare_for_update()
+
+    stages = {
+        'normalize': measure(widget.normalize, repeat),
+        'render': measure(lambda: (widget.update_plot(), widget.canvas.draw()), repeat),
+    }
+    # A sweep through the band like playback without blitting: select, normalize and draw each frame
+    frames = np.linspace(0, meas.n_frequencies - 1, min(meas.n_frequencies, 10)).astype(int)
+    def step():
+        for frame in frames:
+            widget.set_frequency(float(meas.frequencies[frame]), update=False)
+            widget.prepare_for_update()
+            widget.update_plot()
+            widget.canvas.draw()
+    stages['frequency_step'] = measure(step, repeat, len(frames))
+
+    widget.close()
+    tab.deleteLater()
+    app.processEvents()
+    return stages
+
+
+def render_s2p(path, meas: SParameterMeasurement, repeat: int) -> dict:
+    from src.GUI.S2PTab import S2PTab
+    from src.GUI.CustomWidgets import S2PWidget
+
+    app = application()
+    tab = S2PTab()
+    widget = S2PWidget(tab)
+    widget.resize(*RENDER_SIZE)
+    widget.show()
+    app.processEvents()
+    widget.add_sparameters(path, meas)
+
+    stages = {'render': measure(lambda: (widget.update_plot(), widget.canvas.draw()), repeat)}
+    widget.close()
+    tab.deleteLater()
+    app.processEvents()
+    return stages
+
+
+def bench_h5ant(folder, size: tuple[int, int], repeat: int, render: bool) -> dict:
+    n_angles, n_frequencies = size
+    path = Path.join(folder, f'synthetic_{n_angles}x{n_frequencies}.h5ant')
+    stages = {'generate': measure(lambda: write_h5ant(path, n_angles, n_frequencies), 1)}
+
+    stages['load'] = measure(lambda: MultiFrequencyMeasurement.from_file(path), repeat)
+    stages['load_copy'] = measure(lambda: MultiFrequencyMeasurement.from_file(path, mmap=False), repeat)
+    meas = MultiFrequencyMeasurement.from_file(path, mmap=False)
+    stages['metrics'] = measure(lambda: batch_metrics([meas]), repeat)
+    if render: stages.update(render_h5ant(path, meas, repeat))
+
+    return {'kind': 'h5ant', 'size': f'{n_angles}x{n_frequencies}', 'file_bytes': os.path.getsize(path), 'stages': stages}
+
+
+def bench_s2p(folder, n_points: int, repeat: int, render: bool) -> dict:
+    path = Path.join(folder, f'synthetic_{n_points}.s2p')
+    stages = {'generate': measure(lambda: write_s2p(path, n_points), 1)}
+
+    stages['load'] = measure(lambda: SParameterMeasurement.from_file(path), repeat)
+    meas = SParameterMeasurement.from_file(path)
+    stages['metrics'] = measure(lambda: sparameter_figures(meas.frequencies, meas.s), repeat)
+    if render: stages.update(render_s2p(path, meas, repeat))
+
+    return {'kind': 's2p', 'size': str(n_points), 'file_bytes': os.path.getsize(path), 'stages': stages}
+
+
+def version_label() -> str | None:
+    # Described from the source tree, whatever folder the benchmarks are started from
+    try:
+        result = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def environment() -> dict:
+    import matplotlib
+    import h5py
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'h5py': h5py.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, logger) -> int:
+    '''Log the median of every stage against the baseline run, returns the number of regressions.'''
+    previous = {(entry['kind'], entry['size'], stage): values['median']
+                for entry in baseline['results'] for stage, values in entry['stages'].items()}
+    regressions = 0
+    for entry in results['results']:
+        for stage, values in entry['stages'].items():
+            if stage == 'generate': continue
+            old = previous.get((entry['kind'], entry['size'], stage))
+            if not old: continue
+            ratio = values['median'] / old
+            message = f"{entry['kind']} {entry['size']} {stage}: {values['median']*1e3:.1f} ms, {ratio:.2f}x of {baseline.get('label')}"
+            if ratio > tolerance:
+                regressions += 1
+                logger.warning(message)
+            else:
+                logger.info(message)
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m src.benchmarks', description='Time loading, metrics, normalization and rendering on synthetic files.')
+    parser.add_argument('--h5ant', nargs='*', type=parse_size, default=[(360, 100), (3600, 1000)], metavar='AxF',
+                        help='.h5ant sizes as angles x frequencies (default: 360x100 3600x1000, up to 3600x10000)')
+    parser.add_argument('--s2p', nargs='*', type=int, default=[1000, 100_000], metavar='N', help='.s2p point counts (default: 1000 100000)')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='timed runs per stage (default: 5)')
+    parser.add_argument('-o', '--output', help='results file, defaults to benchmark_<time>.json in the output folder')
+    parser.add_argument('--baseline', help='earlier results file to compare the medians against')
+    parser.add_argument('--tolerance', type=float, default=1.2, help='slowdown against the baseline reported as a regression (default: 1.2)')
+    parser.add_argument('--label', help='name of this run, defaults to git describe')
+    parser.add_argument('--keep', metavar='FOLDER', help='write the synthetic files here and keep them, instead of a temporary folder')
+    parser.add_argument('--no-render', action='store_true', help='skip the Qt stages, for machines without PySide6')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    Logging.setup_logging(log_folder=Path.debug_folder())
+    logger = Logging.get_logger('Benchmark')
+    output = args.output or Path.join(Path.output_folder(), time.strftime('benchmark_%Y%m%d_%H%M%S.json'))
+    Path.verify_existance(os.path.dirname(os.path.abspath(output)))
+    render = not args.no_render
+    repeat = max(1, args.repeat)
+
+    results = {
+        'label': args.label or version_label(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'environment': environment(),
+        'results': [],
+    }
+    Tracing.reset()
+    with tempfile.TemporaryDirectory() as temporary:
+        folder = args.keep or temporary
+        Path.verify_existance(folder)
+        for size in args.h5ant:
+            logger.info(f'Benchmarking .h5ant {size[0]}x{size[1]}')
+            results['results'].append(bench_h5ant(folder, size, repeat, render))
+        for n_points in args.s2p:
+            logger.info(f'Benchmarking .s2p {n_points} points')
+            results['results'].append(bench_s2p(folder, n_points, repeat, render))
+    results['spans'] = Tracing.stats()
+
+    for entry in results['results']:
+        medians = ', '.join(f'{stage} {values["median"]*1e3:.1f}' for stage, values in entry['stages'].items())
+        logger.info(f"{entry['kind']} {entry['size']} [ms]: {medians}")
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f'Wrote {output}')
+
+    if args.baseline is None: return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance, logger)
+    return 1 if regressions else 0
@@ -0,0 +1,80 @@
+# Synthetic measurement files shaped like the real ones, for benchmarks at sizes the lab rarely produces.
+
+import numpy as np
+
+BLOCK_BYTES = 32 * 2**20 # powers are generated and written in row blocks of about this size
+
+
+def h5ant_angles(n_angles: int) -> np.ndarray:
+    # Like the turntable files: ascending, -180 included and 180 excluded
+    return np.linspace(-180, 180, n_angles, endpoint=False)
+
+
+def pattern_powers(angles_deg: np.ndarray, frequencies: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    '''angles x frequencies dB pattern: a sinc main lobe narrowing with frequency, sidelobes, a back lobe and noise.'''
+    f0 = frequencies[0]
+    width = 40 * f0 / frequencies # main lobe scale [deg]
+    steer = 10 * np.sin(np.linspace(0, np.pi, len(frequencies))) # peak wanders a little across the band
+    offset = (angles_deg[:, None] - steer[None, :] + 180) % 360 - 180
+
+    amplitude = np.abs(np.sinc(offset / width[None, :])) + 0.03 * np.cos(np.deg2rad(offset))**2 + 1e-3
+    powers = -25 + 20 * np.log10(amplitude)
+    powers += rng.normal(0, .3, powers.shape)
+    return np.maximum(powers, -90)
+
+
+def write_h5ant(path, n_angles: int, n_frequencies: int, seed: int = 0) -> None:
+    '''Write an .h5ant file with the datasets MultiFrequencyMeasurement.from_file reads.
+
+    powers is a contiguous float64 dataset, like the real files, so it is memory mapped when loaded.
+    '''
+    import h5py
+    rng = np.random.default_rng(seed)
+    angles = h5ant_angles(n_angles)
+    frequencies = np.linspace(1e9, 2e9, n_frequencies)
+    velocities = 10 + rng.normal(0, .2, n_angles)
+
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('angles', data=angles)
+        f.create_dataset('frequencies', data=frequencies)
+        f.create_dataset('velocities', data=velocities)
+        powers = f.create_dataset('powers', shape=(n_angles, n_frequencies), dtype=np.float64)
+        rows = max(1, BLOCK_BYTES // (8 * n_frequencies))
+        for start in range(0, n_angles, rows):
+            stop = min(start + rows, n_angles)
+            powers[start:stop] = pattern_powers(angles[start:stop], frequencies, rng)
+
+
+def sparameters(frequencies: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    '''F x 2 x 2 complex S-parameters of a lossy resonator matched around the middle of the band.'''
+    f0 = frequencies[len(frequencies) // 2]
+    q = 20
+    detuning = q * (frequencies / f0 - f0 / frequencies)
+    s11 = (1j * detuning) / (1 + 1j * detuning) * 0.98
+    s21 = 0.9 / (1 + 1j * detuning)
+    s = np.empty((len(frequencies), 2, 2), dtype=complex)
+    s[:, 0, 0] = s11
+    s[:, 1, 1] = s11 * 0.95
+    s[:, 1, 0] = s21
+    s[:, 0, 1] = s21 * 0.99
+    noise = rng.normal(0, 1e-3, s.shape) + 1j * rng.normal(0, 1e-3, s.shape)
+    return s + noise
+
+
+def write_s2p(path, n_points: int, seed: int = 0) -> None:
+    '''Write a Touchstone v1 2-port file in Hz / dB-angle, the format the network analyzers export.'''
+    rng = np.random.default_rng(seed)
+    frequencies = np.linspace(1e9, 2e9, n_points)
+    s = sparameters(frequencies, rng)
+
+    columns = [frequencies]
+    for m, n in ((0, 0), (1, 0), (0, 1), (1, 1)): # Version 1 order: S11 S21 S12 S22
+        columns.append(20 * np.log10(np.abs(s[:, m, n])))
+        columns.append(np.angle(s[:, m, n], deg=True))
+
+    header = (
+        f'! Synthetic 2-port, {n_points} points\n'
+        '# Hz S DB R 50\n'
+        '! Freq S11dB S11Ang S21dB S21Ang S12dB S12Ang S22dB S22Ang'
+    )
+    np.savetxt(path, np.column_stack(columns), fmt='%.9g', header=header, comments='')
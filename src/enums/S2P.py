@@ -2,8 +2,10 @@
 
 from enum import Enum, auto
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-from matplotlib.pyplot import Line2D
+if TYPE_CHECKING:
+    from matplotlib.lines import Line2D
 
 class SParameter(Enum):
     S11 = (0, 0)
@@ -18,7 +20,7 @@ class SParameter(Enum):
 
 @dataclass
 class SParamPlotLines:
-    mag: Line2D
-    phase: Line2D
-    smith: Line2D
+    mag: 'Line2D'
+    phase: 'Line2D'
+    smith: 'Line2D'
     color: tuple
\ No newline at end of file
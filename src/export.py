@@ -0,0 +1,131 @@
+# Batch figure export. Figures are rendered with the Agg canvas in worker processes, so nothing here imports
+# pyplot or PySide6 and exports never block the GUI thread.
+
+import os
+import time
+import numpy as np
+import multiprocessing as mp
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from src.enums import Normalization
+from src.structs.data import MultiFrequencyMeasurement
+from src.util import Logging, Path
+
+
+@dataclass(frozen=True)
+class PlotTemplate:
+    normalization: Normalization = Normalization.LOCAL
+    frequencies: tuple = () # Hz, each snapped to the closest measured frequency. Empty exports all of them
+    formats: tuple = ('png',)
+    dpi: int = 150
+    figsize: tuple = (6., 6.)
+    title: bool = True
+
+
+@dataclass
+class ExportResult:
+    written: list = field(default_factory=list)
+    failed: dict = field(default_factory=dict) # file_path: message
+    seconds: float = 0.
+
+
+def frequency_indices(meas: MultiFrequencyMeasurement, frequencies) -> list[int]:
+    if not len(frequencies): return list(range(meas.n_frequencies))
+    return sorted({meas.closest_frequency_index(frequency) for frequency in frequencies})
+
+
+def figure_name(file_path, frequency, extension) -> str:
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return f'{stem}_{frequency/1e9:g}GHz.{extension}'
+
+
+def pattern_extremes(job) -> tuple[float, float]:
+    # Peak and floor over the exported frequencies of one file, for global normalization
+    file_path, template = job
+    meas = MultiFrequencyMeasurement.from_file(file_path)
+    powers = np.asarray(meas.powers[:, frequency_indices(meas, template.frequencies)])
+    return float(powers.max()), float(powers.min())
+
+
+def render_file(job) -> list[str]:
+    '''Render every exported frequency of one file, returns the written paths. Runs in a worker process.'''
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    file_path, template, folder, extremes = job
+    meas = MultiFrequencyMeasurement.from_file(file_path)
+    label = os.path.splitext(os.path.basename(file_path))[0]
+
+    # One figure and line reused for every frequency, only the data and limits change
+    figure = Figure(figsize=template.figsize, dpi=template.dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111, projection='polar')
+    ax.set_theta_zero_location('N')
+    line, = ax.plot(meas.angles_rad, meas.powers[:, 0], label=label)
+
+    written = []
+    for index in frequency_indices(meas, template.frequencies):
+        pattern = meas.pattern(index)
+        match template.normalization:
+            case Normalization.IGNORED: offset, ylim = 0, (pattern.floor, pattern.peak)
+            case Normalization.LOCAL: offset, ylim = pattern.peak, (pattern.floor - pattern.peak, 0)
+            case Normalization.GLOBAL: offset, ylim = extremes[0], (extremes[1] - extremes[0], 0)
+
+        line.set_ydata(pattern.power - offset)
+        ax.set_ylim(*ylim)
+        if template.title: ax.set_title(f'{label} @ {pattern.frequency/1e9:g} GHz')
+
+        for extension in template.formats:
+            path = Path.join(folder, figure_name(file_path, pattern.frequency, extension))
+            # zlib's fastest level, PNG encoding otherwise costs as much as drawing the figure
+            options = {'pil_kwargs': {'compress_level': 1}} if extension == 'png' else {}
+            figure.savefig(path, format=extension, **options)
+            written.append(path)
+    return written
+
+
+def collect(futures, result: ExportResult, logger, progress=None) -> list:
+    values = []
+    for done, future in enumerate(as_completed(futures), start=1):
+        path = futures[future]
+        try:
+            values.append(future.result())
+        except Exception as e:
+            result.failed[path] = str(e)
+            logger.error(f'Failed to export {path}: {e}')
+        if progress is not None: progress(done, len(futures))
+    return values
+
+
+def export_figures(file_paths, template: PlotTemplate, folder=None, workers=None, progress=None) -> ExportResult:
+    '''Render file_paths with template into folder (default the output folder) on a process pool.
+
+    progress(done, total) is called in the calling process after each file.
+    '''
+    logger = Logging.get_logger('Export')
+    folder = folder or Path.output_folder()
+    Path.verify_existance(folder)
+    result = ExportResult()
+    if not file_paths: return result
+    start = time.perf_counter()
+
+    # Spawned workers, forking a process with a running Qt event loop is not safe
+    context = mp.get_context('spawn')
+    workers = max(1, min(workers or os.cpu_count() or 1, len(file_paths)))
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        extremes = None
+        if template.normalization == Normalization.GLOBAL:
+            futures = {pool.submit(pattern_extremes, (path, template)): path for path in file_paths}
+            values = collect(futures, result, logger)
+            file_paths = [path for path in file_paths if path not in result.failed]
+            if values: extremes = (max(peak for peak, _ in values), min(floor for _, floor in values))
+
+        futures = {pool.submit(render_file, (path, template, folder, extremes)): path for path in file_paths}
+        for written in collect(futures, result, logger, progress):
+            result.written.extend(written)
+
+    result.seconds = time.perf_counter() - start
+    logger.info(f'Exported {len(result.written)} figures to {folder} in {result.seconds:.1f} s')
+    return result
@@ -0,0 +1,87 @@
+# Vectorized beamwidth of circular radiation patterns, for one or all frequencies at once.
+
+import numpy as np
+from dataclasses import dataclass
+
+# Upper bound on gathered samples per block, keeps angles x frequencies temporaries small
+BLOCK_SAMPLES = 2**22
+
+
+@dataclass
+class Beamwidth:
+    left: np.ndarray # crossing walking towards increasing sample index [deg]
+    right: np.ndarray # crossing walking towards decreasing sample index [deg]
+    width: np.ndarray # angular span from right to left crossing through the peak [deg]
+    peak_index: np.ndarray
+    level_db: float
+
+
+def wrap_deg(angles):
+    return (angles + 180) % 360 - 180
+
+
+def crossing_offsets(powers: np.ndarray, start: np.ndarray, threshold: np.ndarray, direction: int) -> np.ndarray:
+    '''Samples walked circularly from start until powers first drop below threshold, -1 if they never do.
+
+    powers is angles x frequencies, start and threshold hold one value per frequency.
+    '''
+    n_angles, n_freqs = powers.shape
+    offsets = np.full(n_freqs, -1, dtype=np.intp)
+    steps = np.arange(n_angles)[:, None] * direction
+    block = max(1, BLOCK_SAMPLES // n_angles)
+
+    for lo in range(0, n_freqs, block):
+        cols = np.arange(lo, min(lo + block, n_freqs))
+        rows = (start[cols][None, :] + steps) % n_angles
+        below = powers[rows, cols[None, :]] < threshold[cols][None, :]
+        found = below.any(axis=0)
+        offsets[cols[found]] = np.argmax(below[:, found], axis=0)
+    return offsets
+
+
+def interpolate_crossing(angles_deg, powers, start, offsets, threshold, direction) -> np.ndarray:
+    # Linear interpolation between the last sample above and the first sample below the threshold
+    n_angles = len(angles_deg)
+    cols = np.arange(powers.shape[1])
+    found = offsets >= 0
+
+    i_below = (start + direction * offsets) % n_angles
+    i_above = (i_below - direction) % n_angles
+    p_below = powers[i_below, cols]
+    p_above = powers[i_above, cols]
+    # frac is nan for columns without a crossing, those are masked below
+    with np.errstate(invalid='ignore', divide='ignore'):
+        frac = (p_above - threshold) / (p_above - p_below)
+        step = wrap_deg(angles_deg[i_below] - angles_deg[i_above])
+        crossing = wrap_deg(angles_deg[i_above] + frac * step)
+    return np.where(found, crossing, np.nan)
+
+
+def beamwidth(angles_deg: np.ndarray, powers: np.ndarray, level_db: float = 3.) -> Beamwidth:
+    '''Beamwidth at level_db below the peak, powers is either one pattern or angles x frequencies.'''
+    single = powers.ndim == 1
+    if single: powers = powers[:, None]
+
+    order = None
+    if np.any(np.diff(angles_deg) < 0):
+        order = np.argsort(angles_deg)
+        angles_deg, powers = angles_deg[order], powers[order]
+
+    level_db = abs(level_db)
+    cols = np.arange(powers.shape[1])
+    peak_index = np.argmax(powers, axis=0)
+    peak_angle = angles_deg[peak_index]
+    threshold = powers[peak_index, cols] - level_db
+
+    crossings = {}
+    for direction in (1, -1):
+        offsets = crossing_offsets(powers, peak_index, threshold, direction)
+        crossings[direction] = interpolate_crossing(angles_deg, powers, peak_index, offsets, threshold, direction)
+
+    left, right = crossings[1], crossings[-1]
+    width = (left - peak_angle) % 360 + (peak_angle - right) % 360
+    if order is not None: peak_index = order[peak_index]
+
+    if single:
+        return Beamwidth(left[0], right[0], width[0], peak_index[0], level_db)
+    return Beamwidth(left, right, width, peak_index, level_db)
@@ -0,0 +1,29 @@
+# Display decimation of dense traces, keeps the visual envelope with a bounded number of points.
+
+import numpy as np
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, n_buckets: int) -> tuple[np.ndarray, np.ndarray]:
+    '''Keep the minimum and maximum sample of each of n_buckets equal-count buckets, in x order.
+
+    Every peak and dip (e.g. a resonance in S11) survives, which plain striding or averaging would lose.
+    '''
+    n = len(x)
+    if n_buckets < 1 or n <= 2*n_buckets: return x, y
+
+    size = int(np.ceil(n / n_buckets))
+    n_buckets = int(np.ceil(n / size))
+    buckets = np.pad(y, (0, n_buckets*size - n), mode='edge').reshape(n_buckets, size)
+
+    offsets = np.arange(n_buckets)[:, None] * size
+    picks = np.stack([np.argmin(buckets, axis=1), np.argmax(buckets, axis=1)], axis=1)
+    indices = np.minimum(np.sort(picks, axis=1) + offsets, n - 1).ravel()
+    indices = np.unique(np.concatenate([[0], indices, [n - 1]]))
+    return x[indices], y[indices]
+
+
+def visible_slice(x: np.ndarray, xmin: float, xmax: float) -> slice:
+    # Samples inside [xmin, xmax] of a sorted x, plus one neighbour each side so lines reach the edges
+    start = max(np.searchsorted(x, xmin, side='left') - 1, 0)
+    stop = min(np.searchsorted(x, xmax, side='right') + 1, len(x))
+    return slice(start, stop)
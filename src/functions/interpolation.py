@@ -0,0 +1,67 @@
+# Linear interpolation on circular angle axes.
+
+import numpy as np
+
+
+def circular_neighbours(angles_deg: np.ndarray, query_deg: np.ndarray):
+    '''Indices of the sorted samples bracketing each query angle and the fraction between them.'''
+    n_angles = len(angles_deg)
+    base = angles_deg[0]
+    query = base + (query_deg - base) % 360
+
+    upper = np.searchsorted(angles_deg, query, side='right')
+    lower = upper - 1
+    wrapped = upper == n_angles
+    upper = np.where(wrapped, 0, upper)
+
+    a0 = angles_deg[lower]
+    a1 = angles_deg[upper] + 360*wrapped
+    span = a1 - a0
+    frac = np.divide(query - a0, span, out=np.zeros_like(query), where=span > 0)
+    return lower, upper, frac
+
+
+def circular_interp(angles_deg: np.ndarray, values: np.ndarray, query_deg) -> np.ndarray:
+    '''Interpolate values sampled at sorted, unique angles (mod 360) at query_deg, wrapping across +-180.
+
+    values is angles x columns and query_deg queries x columns, or both 1D for a single pattern.
+    '''
+    single = values.ndim == 1
+    query_deg = np.asarray(query_deg, dtype=float)
+    if single:
+        values = values[:, None]
+        query_deg = query_deg.reshape(-1, 1)
+
+    lower, upper, frac = circular_neighbours(angles_deg, query_deg)
+    cols = np.arange(values.shape[1])[None, :]
+    v0 = values[lower, cols]
+    v1 = values[upper, cols]
+    result = v0 + frac*(v1 - v0)
+    return result[:, 0] if single else result
+
+
+class CircularAngleIndex:
+    '''Sorted view of a measured angle axis for O(log n) lookups, built once per measurement.'''
+
+    def __init__(self, angles_deg: np.ndarray):
+        wrapped = (np.asarray(angles_deg, dtype=float) + 180) % 360 - 180
+        order = np.argsort(wrapped, kind='stable')
+        # Repeated angles (mod 360) would give zero width brackets, keep the first sample of each
+        self.angles, first = np.unique(wrapped[order], return_index=True)
+        self.order = order[first]
+
+    def neighbours(self, query_deg):
+        # Bracketing sample indices in the original (unsorted) layout
+        lower, upper, frac = circular_neighbours(self.angles, np.asarray(query_deg, dtype=float))
+        return self.order[lower], self.order[upper], frac
+
+    def nearest(self, query_deg):
+        lower, upper, frac = self.neighbours(query_deg)
+        return np.where(frac < 0.5, lower, upper)
+
+    def interpolate(self, values: np.ndarray, query_deg):
+        '''Values at query_deg, values is indexed like the original angles, optionally x frequencies.'''
+        lower, upper, frac = self.neighbours(query_deg)
+        v0, v1 = values[lower], values[upper]
+        if values.ndim > 1: frac = frac[..., None]
+        return v0 + frac*(v1 - v0)
@@ -0,0 +1,157 @@
+# Pattern metrics for many measurements and all their frequencies, computed as stacked array reductions.
+
+import numpy as np
+from typing import TYPE_CHECKING
+
+from .beamwidth import beamwidth, wrap_deg, BLOCK_SAMPLES
+from .interpolation import circular_interp
+from src.util import Tracing
+
+if TYPE_CHECKING:
+    from src.structs import MultiFrequencyMeasurement
+
+
+METRICS_DTYPE = np.dtype([
+    ('measurement', np.int32),
+    ('frequency_index', np.int32),
+    ('frequency', np.float64),
+    ('peak', np.float64),
+    ('floor', np.float64),
+    ('peak_angle', np.float64),
+    ('hpbw', np.float64),
+    ('hpbw_left', np.float64),
+    ('hpbw_right', np.float64),
+    ('front_to_back', np.float64),
+    ('sidelobe_level', np.float64), # higher of the first lobes either side of the main lobe, relative to the peak [dB]
+])
+
+
+def circular_smooth(powers: np.ndarray, window: int) -> np.ndarray:
+    # Moving average along the angle axis, wrapping around the pattern
+    if window <= 1: return powers
+    half = window // 2
+    padded = np.concatenate([powers[-half:], powers, powers[:half]], axis=0)
+    summed = np.cumsum(padded, axis=0)
+    summed = np.concatenate([np.zeros((1, powers.shape[1])), summed], axis=0)
+    return (summed[window:] - summed[:-window])[:len(powers)] / window
+
+
+def first_turn(walk, start, rise_db) -> tuple[np.ndarray, np.ndarray]:
+    '''Per column, the first minimum of walk at or after start that walk then climbs more than rise_db above.
+
+    Returns (found, index of the minimum). The hysteresis keeps ripple and noise from counting as a turn,
+    negate walk to find maxima instead.
+    '''
+    steps = np.arange(walk.shape[0])[:, None]
+    active = steps >= start[None, :]
+    values = np.where(active, walk, np.inf)
+    running = np.minimum.accumulate(values, axis=0)
+    last_minimum = np.maximum.accumulate(np.where(active & (values <= running), steps, -1), axis=0)
+    turned = active & (values > running + rise_db)
+    found = turned.any(axis=0)
+    turn = np.argmax(turned, axis=0)
+    return found, last_minimum[turn, np.arange(walk.shape[1])]
+
+
+def first_sidelobe(powers, smoothed, peak_index, threshold, direction, rise_db) -> np.ndarray:
+    '''Level of the first lobe past the main lobe null walking circularly in direction, nan if there is none.
+
+    The null is the first minimum past the level crossing which the smoothed pattern climbs out of by more
+    than rise_db, the lobe is the maximum after it which the pattern then falls from by more than rise_db.
+    '''
+    n_angles, n_freqs = powers.shape
+    levels = np.full(n_freqs, np.nan)
+    steps = np.arange(n_angles)[:, None] * direction
+    block = max(1, BLOCK_SAMPLES // n_angles)
+
+    for lo in range(0, n_freqs, block):
+        cols = np.arange(lo, min(lo + block, n_freqs))
+        index = (peak_index[cols][None, :] + steps) % n_angles
+        walk = smoothed[index, cols[None, :]]
+        below = walk < threshold[cols][None, :]
+        crossed = below.any(axis=0)
+        has_null, null = first_turn(walk, np.argmax(below, axis=0), rise_db)
+        has_lobe, lobe = first_turn(-walk, null, rise_db)
+        found = crossed & has_null & has_lobe
+        # The raw maximum between the null and the lobe, smoothing flattens narrow lobes
+        raw = powers[index, cols[None, :]]
+        between = (np.arange(n_angles)[:, None] >= null[None, :]) & (np.arange(n_angles)[:, None] <= lobe[None, :])
+        peak_between = np.where(between, raw, -np.inf).max(axis=0)
+        levels[cols] = np.where(found, peak_between, np.nan)
+    return levels
+
+
+def sidelobe_levels(powers, peak_index, peak, threshold, smooth_window, rise_db=3.) -> np.ndarray:
+    # Higher of the first lobes on either side of the main lobe, relative to the peak
+    smoothed = circular_smooth(powers, smooth_window)
+    forward = first_sidelobe(powers, smoothed, peak_index, threshold, 1, rise_db)
+    backward = first_sidelobe(powers, smoothed, peak_index, threshold, -1, rise_db)
+    return np.fmax(forward, backward) - peak # nan only if neither side has a lobe
+
+
+@Tracing.traced('metrics.pattern')
+def pattern_metrics(angles_deg: np.ndarray, powers: np.ndarray, level_db: float = 3., smooth_deg: float = 2., null_rise_db: float = 3.) -> np.ndarray:
+    '''Metrics for every column of an angles x frequencies powers matrix, as a METRICS_DTYPE array.
+
+    smooth_deg is the moving average window used only to locate the main lobe nulls in noisy patterns. A null
+    (and the end of the first sidelobe) only counts once the smoothed pattern turns by more than null_rise_db.
+    '''
+    if powers.ndim == 1: powers = powers[:, None]
+    if np.any(np.diff(angles_deg) < 0):
+        order = np.argsort(angles_deg)
+        angles_deg, powers = angles_deg[order], powers[order]
+
+    n_angles, n_freqs = powers.shape
+    cols = np.arange(n_freqs)
+    bw = beamwidth(angles_deg, powers, level_db)
+    peak = powers[bw.peak_index, cols]
+    peak_angle = angles_deg[bw.peak_index]
+
+    back = circular_interp(angles_deg, powers, wrap_deg(peak_angle + 180)[None, :])[0]
+
+    spacing = 360 / n_angles
+    window = max(1, int(round(smooth_deg / spacing)))
+    sidelobe = sidelobe_levels(powers, bw.peak_index, peak, peak - abs(level_db), window, null_rise_db)
+
+    result = np.zeros(n_freqs, dtype=METRICS_DTYPE)
+    result['frequency_index'] = cols
+    result['peak'] = peak
+    result['floor'] = powers.min(axis=0)
+    result['peak_angle'] = peak_angle
+    result['hpbw'] = bw.width
+    result['hpbw_left'] = bw.left
+    result['hpbw_right'] = bw.right
+    result['front_to_back'] = peak - back
+    result['sidelobe_level'] = sidelobe
+    return result
+
+
+@Tracing.traced('metrics.batch')
+def batch_metrics(measurements: list['MultiFrequencyMeasurement'], level_db: float = 3., smooth_deg: float = 2.) -> np.ndarray:
+    '''Metrics for N measurements x F frequencies as one METRICS_DTYPE array, ordered by measurement.
+
+    Measurements sharing an angle grid are stacked column-wise and reduced together.
+    '''
+    groups = {} # angle grid: measurement indices
+    for i, meas in enumerate(measurements):
+        angles = np.asarray(meas.angles_deg)
+        groups.setdefault((angles.shape, angles.tobytes()), []).append(i)
+
+    parts = [None] * len(measurements)
+    for indices in groups.values():
+        angles = np.asarray(measurements[indices[0]].angles_deg)
+        powers = np.hstack([measurements[i].powers for i in indices])
+        stacked = pattern_metrics(angles, powers, level_db, smooth_deg)
+
+        start = 0
+        for i in indices:
+            meas = measurements[i]
+            part = stacked[start:start + meas.n_frequencies]
+            part['measurement'] = i
+            part['frequency_index'] = np.arange(meas.n_frequencies)
+            part['frequency'] = meas.frequencies
+            parts[i] = part
+            start += meas.n_frequencies
+
+    if not parts: return np.zeros(0, dtype=METRICS_DTYPE)
+    return np.concatenate(parts)
@@ -0,0 +1,89 @@
+# Multi-resolution pyramid of a 2D matrix, so views of any zoom level only slice a level of about screen size.
+
+import numpy as np
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class PyramidLevel:
+    data: np.ndarray
+    row_factor: int # base rows per cell
+    col_factor: int
+
+
+@dataclass(frozen=True, slots=True)
+class PyramidView:
+    data: np.ndarray
+    rows: tuple[int, int] # [start, stop) in base rows covered by data
+    cols: tuple[int, int]
+    level: tuple[int, int]
+
+
+def halve(data: np.ndarray, axis: int, reduce) -> np.ndarray:
+    # Combines neighbouring pairs along axis, an odd last sample is carried over as is
+    data = np.moveaxis(data, axis, 0)
+    n = data.shape[0]
+    pairs = reduce(data[0:n - 1:2], data[1::2])
+    if n % 2: pairs = np.concatenate([pairs, data[-1:]], axis=0)
+    return np.moveaxis(pairs, 0, axis)
+
+
+def halvings(n: int, min_size: int) -> int:
+    count = 0
+    while n > min_size:
+        n = (n + 1) // 2
+        count += 1
+    return count
+
+
+class ResolutionPyramid:
+    '''Reduced copies of a rows x columns matrix, halved independently along each axis down to min_size.
+
+    Level (i, j) has 2**i base rows and 2**j base columns per cell, so a view zoomed along only one axis
+    still gets a coarse level along the other. reduce combines two cells into one, np.maximum by default so
+    peaks stay visible when zoomed out. Level (0, 0) is the matrix itself (it may be a memmap), the reduced
+    levels are float32 display copies built from their finer neighbour, together about 1.5x the matrix bytes.
+    '''
+    def __init__(self, matrix: np.ndarray, min_size: int = 64, reduce=np.maximum):
+        self.shape = matrix.shape
+        n_row_levels = halvings(matrix.shape[0], min_size) + 1
+        n_col_levels = halvings(matrix.shape[1], min_size) + 1
+
+        self.levels = [[None] * n_col_levels for _ in range(n_row_levels)]
+        for i in range(n_row_levels):
+            for j in range(n_col_levels):
+                if i == j == 0: data = matrix
+                elif j == 0: data = halve(self.levels[i - 1][0].data, 0, reduce)
+                else: data = halve(self.levels[i][j - 1].data, 1, reduce)
+                if i or j: data = np.ascontiguousarray(data, dtype=np.float32)
+                self.levels[i][j] = PyramidLevel(data, 2**i, 2**j)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.data.nbytes for row in self.levels for level in row) - self.levels[0][0].data.nbytes
+
+    def level_for(self, rows: tuple[int, int], cols: tuple[int, int], max_rows: int, max_cols: int) -> tuple[int, int]:
+        # Coarsest level along each axis which still has at least the requested resolution in the view
+        def coarsest(n, wanted, n_levels):
+            wanted = min(wanted, n)
+            index = 0
+            while index + 1 < n_levels and n / 2**(index + 1) >= wanted:
+                index += 1
+            return index
+        return coarsest(rows[1] - rows[0], max_rows, len(self.levels)), coarsest(cols[1] - cols[0], max_cols, len(self.levels[0]))
+
+    def view(self, rows: tuple[int, int], cols: tuple[int, int], max_rows: int, max_cols: int) -> PyramidView:
+        '''Cells covering base rows [rows) and columns [cols) from the coarsest level with enough detail.'''
+        rows = (max(0, int(rows[0])), min(self.shape[0], int(rows[1])))
+        cols = (max(0, int(cols[0])), min(self.shape[1], int(cols[1])))
+        i, j = self.level_for(rows, cols, max_rows, max_cols)
+        level = self.levels[i][j]
+
+        r0, r1 = rows[0] // level.row_factor, -(-rows[1] // level.row_factor)
+        c0, c1 = cols[0] // level.col_factor, -(-cols[1] // level.col_factor)
+        return PyramidView(
+            np.asarray(level.data[r0:r1, c0:c1]),
+            (r0 * level.row_factor, min(r1 * level.row_factor, self.shape[0])),
+            (c0 * level.col_factor, min(c1 * level.col_factor, self.shape[1])),
+            (i, j),
+        )
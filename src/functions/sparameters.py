@@ -0,0 +1,54 @@
+# Scalar figures of merit for 2-port S-parameter sweeps.
+
+import numpy as np
+
+
+def crossing_frequency(frequencies, values, inside, outside, threshold) -> float:
+    # Linear interpolation between the last sample inside the band and the first one outside
+    f0, f1 = frequencies[inside], frequencies[outside]
+    y0, y1 = values[inside], values[outside]
+    if y1 == y0: return float(f0)
+    return float(f0 + (threshold - y0) * (f1 - f0) / (y1 - y0))
+
+
+def band_around(frequencies: np.ndarray, values: np.ndarray, index: int, threshold: float) -> tuple[float, float]:
+    '''Edges of the contiguous band around index where values <= threshold, nan if index is outside it.'''
+    below = values <= threshold
+    if not below[index]: return np.nan, np.nan
+
+    outside = np.flatnonzero(~below)
+    left_out = outside[outside < index]
+    right_out = outside[outside > index]
+
+    low = frequencies[0] if not left_out.size else crossing_frequency(frequencies, values, left_out[-1] + 1, left_out[-1], threshold)
+    high = frequencies[-1] if not right_out.size else crossing_frequency(frequencies, values, right_out[0] - 1, right_out[0], threshold)
+    return float(low), float(high)
+
+
+def sparameter_figures(frequencies: np.ndarray, s: np.ndarray, return_loss_db: float = 10.) -> dict:
+    '''Match and transmission figures of an F x 2 x 2 sweep. The matched band is where |Sii| <= -return_loss_db.'''
+    if not len(frequencies): raise ValueError('Empty S-parameter sweep')
+    s_db = 20*np.log10(np.maximum(np.abs(s), 1e-30))
+    figures = {
+        'points': len(frequencies),
+        'f_start': float(frequencies[0]),
+        'f_stop': float(frequencies[-1]),
+    }
+
+    for name, (m, n) in (('s11', (0, 0)), ('s22', (1, 1))):
+        trace = s_db[:, m, n]
+        index = int(np.argmin(trace))
+        low, high = band_around(frequencies, trace, index, -abs(return_loss_db))
+        figures[f'{name}_min_db'] = float(trace[index])
+        figures[f'{name}_min_frequency'] = float(frequencies[index])
+        figures[f'{name}_band_low'] = low
+        figures[f'{name}_band_high'] = high
+        figures[f'{name}_bandwidth'] = high - low
+
+    for name, (m, n) in (('s21', (1, 0)), ('s12', (0, 1))):
+        trace = s_db[:, m, n]
+        index = int(np.argmax(trace))
+        figures[f'{name}_max_db'] = float(trace[index])
+        figures[f'{name}_max_frequency'] = float(frequencies[index])
+        figures[f'{name}_mean_db'] = float(trace.mean())
+    return figures
@@ -1 +1,5 @@
-from .data import AntennaMeasurement
\ No newline at end of file
+from .data import AntennaMeasurement, MultiFrequencyMeasurement, SParameterMeasurement, PatternMetrics
+from .cache import MeasurementCache, measurement_cache
+from .sidecar import SidecarCache, sidecar_cache, load_measurement, load_sparameters
+from .extremes import ExtremesTracker
+from .index import MeasurementIndex, measurement_index
\ No newline at end of file
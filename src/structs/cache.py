@@ -0,0 +1,98 @@
+
+import os
+import threading
+import numpy as np
+
+from collections import OrderedDict
+
+from .data import MultiFrequencyMeasurement
+from .sidecar import load_measurement
+
+
+class MeasurementCache:
+    '''Process wide LRU cache of parsed measurements, bounded by a byte budget.'''
+
+    def __init__(self, byte_budget: int = 256 * 2**20, loader = load_measurement):
+        self.byte_budget = byte_budget
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+
+        self._entries = OrderedDict() # (path, mtime, size): (measurement, nbytes)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path) -> tuple:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def measurement_nbytes(meas) -> int:
+        arrays = (getattr(meas, name, None) for name in ('angles_deg', 'frequencies', 'velocities', 'powers'))
+        return sum(a.nbytes for a in arrays if isinstance(a, np.ndarray))
+
+    def load(self, path) -> MultiFrequencyMeasurement:
+        key = self.key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Parse outside the lock so other threads can keep hitting the cache
+        meas = self.loader(path)
+        self.insert(key, meas)
+        return meas
+
+    def insert(self, key: tuple, meas) -> None:
+        nbytes = self.measurement_nbytes(meas)
+        with self._lock:
+            # Older versions of the same file can never be hit again
+            for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                self._drop(stale)
+            if key in self._entries: self._drop(key)
+
+            self._entries[key] = (meas, nbytes)
+            self.nbytes += nbytes
+            self._evict()
+
+    def set_byte_budget(self, byte_budget: int) -> None:
+        with self._lock:
+            self.byte_budget = byte_budget
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'nbytes': self.nbytes,
+                'byte_budget': self.byte_budget,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _drop(self, key) -> None:
+        _, nbytes = self._entries.pop(key)
+        self.nbytes -= nbytes
+
+    def _evict(self) -> None:
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while self.nbytes > self.byte_budget and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path) -> bool:
+        return self.key(path) in self._entries
+
+
+measurement_cache = MeasurementCache()
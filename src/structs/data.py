@@ -1,85 +1,171 @@
 
-import h5py
 import numpy as np
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 
-from src.enums import Sign
+from src.enums import Sign, SParameter
+from src.functions.beamwidth import Beamwidth, beamwidth, crossing_offsets
+from src.functions.interpolation import CircularAngleIndex
+from src.util import Tracing
 
-@dataclass
+from .touchstone import read_touchstone
+
+
+def map_dataset(path, dataset) -> np.ndarray | None:
+    # Contiguous, unfiltered datasets are one raw block in the file which numpy can map directly.
+    # Chunked (and therefore compressed) or virtual layouts have to go through h5py.
+    if dataset.chunks is not None or dataset.compression is not None: return None
+    if dataset.is_virtual or dataset.external or dataset.size == 0: return None
+    offset = dataset.id.get_offset()
+    if offset is None: return None
+    return np.memmap(path, dtype=dataset.dtype, mode='r', offset=offset, shape=dataset.shape)
+
+
+@dataclass(frozen=True, slots=True)
+class PatternMetrics:
+    # Derived metrics of one pattern, small enough to pass around without the raw arrays
+    frequency: float
+    peak: float
+    peak_index: int
+    floor: float
+    floor_index: int
+    angle_at_peak: float
+    HPBW: float
+    HPBW_left: float
+    HPBW_right: float
+
+    @staticmethod
+    @Tracing.traced('metrics.pattern_gui')
+    def from_pattern(angles_deg, power, frequency) -> 'PatternMetrics':
+        peak_index = int(np.argmax(power))
+        floor_index = int(np.argmin(power))
+        bw = beamwidth(angles_deg, power, 3)
+        return PatternMetrics(
+            frequency = float(frequency),
+            peak = float(power[peak_index]),
+            peak_index = peak_index,
+            floor = float(power[floor_index]),
+            floor_index = floor_index,
+            angle_at_peak = float(angles_deg[peak_index]),
+            HPBW = float(bw.width),
+            HPBW_left = float(bw.left),
+            HPBW_right = float(bw.right)
+        )
+
+
+@dataclass(slots=True)
 class AntennaMeasurement:
     angles_deg: np.ndarray
     frequency: np.ndarray
-    velocities: np.ndarray
+    velocities: np.ndarray | None
     power: np.ndarray
 
+    # Derived values are computed once, see invalidate()
+    _metrics: PatternMetrics | None = field(default=None, init=False, repr=False, compare=False)
+    _angles_rad: np.ndarray | None = field(default=None, init=False, repr=False, compare=False)
+    _angle_index: CircularAngleIndex | None = field(default=None, init=False, repr=False, compare=False)
+    _beamwidths: dict | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if not name.startswith('_'): self.invalidate()
+
+    def invalidate(self) -> None:
+        # Call after modifying the arrays in place, assigning a new array does it automatically
+        object.__setattr__(self, '_metrics', None)
+        object.__setattr__(self, '_angles_rad', None)
+        object.__setattr__(self, '_angle_index', None)
+        object.__setattr__(self, '_beamwidths', None)
+
     def power_at(self, angle_deg):
-        return self.power[self.closest_angle_index(angle_deg)]
+        # Linear interpolation between the neighbouring samples, scalars or arrays of angles
+        power = self.angle_index.interpolate(self.power, angle_deg)
+        return power.item() if np.ndim(angle_deg) == 0 else power
+
+    @property
+    def angle_index(self) -> CircularAngleIndex:
+        if self._angle_index is None: self._angle_index = CircularAngleIndex(self.angles_deg)
+        return self._angle_index
 
     @property
-    def angles_rad(self) -> float:
-        return np.deg2rad(self.angles_deg)
+    def metrics(self) -> PatternMetrics:
+        if self._metrics is None:
+            self._metrics = PatternMetrics.from_pattern(self.angles_deg, self.power, self.frequency)
+        return self._metrics
+
+    @property
+    def angles_rad(self) -> np.ndarray:
+        if self._angles_rad is None: self._angles_rad = np.deg2rad(self.angles_deg)
+        return self._angles_rad
     
     @property
     def floor(self) -> float:
-        return np.min(self.power)
+        return self.metrics.floor
     
     @property
     def floor_index(self) -> int:
-        return np.argmin(self.power)
+        return self.metrics.floor_index
     
     @property
     def peak(self) -> float:
-        return np.max(self.power)
+        return self.metrics.peak
     
     @property
     def peak_index(self) -> int:
-        return np.argmax(self.power)
+        return self.metrics.peak_index
     
     @property
     def angle_at_peak(self) -> float:
-        return self.angles_deg[self.peak_index]
+        return self.metrics.angle_at_peak
     
     @property
     def HPBW(self) -> float:
-        return abs(self.HPBW_left - self.HPBW_right)
+        return self.metrics.HPBW
     
     @property
     def HPBW_left(self) -> float:
-        index = self.dist_from_peak(Sign.POSITIVE, 3)
-        return self.angles_deg[index]
+        return self.metrics.HPBW_left
     
     @property
     def HPBW_right(self) -> float:
-        index = self.dist_from_peak(Sign.NEGATIVE, 3)
-        return self.angles_deg[index]
-
+        return self.metrics.HPBW_right
 
-    def dist_from_peak(self, direction: Sign, db = 3) -> int:
-        current_index = self.peak_index
-        while self.peak < self.power[current_index] + db:
-            current_index += direction.value
-            if current_index > len(self.power)-1 and direction == Sign.POSITIVE: current_index = 0
-            if current_index < 0 and direction == Sign.NEGATIVE: current_index = len(self.power)-1
+    def beamwidth(self, db = 3) -> Beamwidth:
+        if self._beamwidths is None: self._beamwidths = {}
+        if db not in self._beamwidths:
+            self._beamwidths[db] = beamwidth(self.angles_deg, self.power, db)
+        return self._beamwidths[db]
 
-        return current_index
+    def dist_from_peak(self, direction: Sign, db = 3) -> int | None:
+        # Index of the first sample at least db below the peak, walking circularly in direction.
+        # None if the pattern never drops that far, -1 would be a valid index
+        power = self.power[:, None]
+        start = np.array([self.peak_index])
+        offset = crossing_offsets(power, start, np.array([self.peak - db]), direction.value)[0]
+        if offset < 0: return None
+        return (self.peak_index + direction.value * offset) % len(self.power)
 
 
     def closest_angle_index(self, target) -> int:
-        delta = (self.angles_deg - target + 180) % 360 - 180
-        return np.argmin(np.abs(delta))
+        index = self.angle_index.nearest(target)
+        return int(index) if np.ndim(index) == 0 else index
 
     @staticmethod
-    def from_file(path, freq=-1):
-        data={}
+    @Tracing.traced('from_file.h5ant')
+    def from_file(path, freq=-1, load_velocities=False):
+        import h5py
+        # Only read the hyperslabs we need, h5py hands them back as arrays directly
         with h5py.File(path, 'r') as f:
-            for i in list(f.keys()): data[i]=(list(f[i]))
-        
+            angles = f['angles'][()]
+            frequency = f['frequencies'][freq]
+            power = f['powers'][:, freq]
+            velocities = f['velocities'][()] if load_velocities else None
+
         return AntennaMeasurement(
-            angles_deg = np.array(data['angles']),
-            frequency = np.array(data['frequencies'])[freq],
-            velocities = np.array(data['velocities']),
-            power = np.array(data['powers'])[::, freq]
+            angles_deg = angles,
+            frequency = frequency,
+            velocities = velocities,
+            power = power
         )
     
     @property
@@ -88,4 +174,200 @@ class AntennaMeasurement:
             f"HPBW: {self.HPBW} [deg]\n"
             f"Peak power: {self.peak} [dbm]\n"
             f"Peak angle: {self.angle_at_peak} [deg]\n"
-        )
\ No newline at end of file
+        )
+
+
+@dataclass(slots=True)
+class MultiFrequencyMeasurement:
+    angles_deg: np.ndarray
+    frequencies: np.ndarray
+    velocities: np.ndarray | None
+    powers: np.ndarray # angles x frequencies, same layout as the file
+    frequency_index: int = -1
+
+    # Per-frequency patterns with their memoized metrics, shared by every selection of the same arrays
+    _patterns: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _angles_rad: np.ndarray | None = field(default=None, init=False, repr=False, compare=False)
+    _angle_index: CircularAngleIndex | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if not name.startswith('_') and name != 'frequency_index': self.invalidate()
+
+    def invalidate(self) -> None:
+        # New dict rather than clear(), other selections may still hold the old arrays
+        object.__setattr__(self, '_patterns', {})
+        object.__setattr__(self, '_angles_rad', None)
+        object.__setattr__(self, '_angle_index', None)
+
+    def pattern(self, index: int = None) -> AntennaMeasurement:
+        # Views into the powers matrix, nothing is copied
+        if index is None: index = self.frequency_index
+        index = index % self.n_frequencies
+        pattern = self._patterns.get(index)
+        if pattern is None:
+            pattern = AntennaMeasurement(
+                angles_deg = self.angles_deg,
+                frequency = self.frequencies[index],
+                velocities = self.velocities,
+                power = self.powers[:, index]
+            )
+            pattern._angles_rad = self.angles_rad
+            pattern._angle_index = self.angle_index
+            self._patterns[index] = pattern
+        return pattern
+
+    def select(self, index: int) -> 'MultiFrequencyMeasurement':
+        # New selection sharing the same arrays, so cached instances are never mutated
+        if index >= 0: index = min(index, self.n_frequencies - 1)
+        selected = replace(self, frequency_index=index)
+        selected._patterns = self._patterns
+        selected._angles_rad = self._angles_rad
+        selected._angle_index = self._angle_index
+        return selected
+
+    def power_at(self, angle_deg, frequency: float = None):
+        # frequency in Hz picks the closest measured frequency, otherwise the selected one
+        if frequency is None: return self.pattern().power_at(angle_deg)
+        return self.pattern(self.closest_frequency_index(frequency)).power_at(angle_deg)
+
+    def closest_frequency_index(self, frequency):
+        # Scalars or arrays of frequencies [Hz], e.g. a whole playback axis at once
+        order = np.argsort(self.frequencies, kind='stable')
+        ordered = self.frequencies[order]
+        right = np.minimum(np.searchsorted(ordered, frequency), len(ordered) - 1)
+        left = np.maximum(right - 1, 0)
+        closer_left = np.abs(ordered[left] - frequency) <= np.abs(ordered[right] - frequency)
+        index = order[np.where(closer_left, left, right)]
+        return int(index) if np.ndim(frequency) == 0 else index
+
+    @property
+    def angle_index(self) -> CircularAngleIndex:
+        if self._angle_index is None: self._angle_index = CircularAngleIndex(self.angles_deg)
+        return self._angle_index
+
+    @property
+    def n_frequencies(self) -> int:
+        return len(self.frequencies)
+
+    @property
+    def frequency(self) -> float:
+        return self.frequencies[self.frequency_index]
+
+    @property
+    def power(self) -> np.ndarray:
+        return self.powers[:, self.frequency_index]
+
+    @property
+    def angles_rad(self) -> np.ndarray:
+        if self._angles_rad is None: self._angles_rad = np.deg2rad(self.angles_deg)
+        return self._angles_rad
+
+    @property
+    def metrics(self) -> PatternMetrics:
+        return self.pattern().metrics
+
+    @property
+    def floor(self) -> float:
+        return self.pattern().floor
+
+    @property
+    def floor_index(self) -> int:
+        return self.pattern().floor_index
+
+    @property
+    def peak(self) -> float:
+        return self.pattern().peak
+
+    @property
+    def peak_index(self) -> int:
+        return self.pattern().peak_index
+
+    @property
+    def angle_at_peak(self) -> float:
+        return self.pattern().angle_at_peak
+
+    @property
+    def HPBW(self) -> float:
+        return self.pattern().HPBW
+
+    @property
+    def HPBW_left(self) -> float:
+        return self.pattern().HPBW_left
+
+    @property
+    def HPBW_right(self) -> float:
+        return self.pattern().HPBW_right
+
+    def beamwidth(self, db = 3) -> Beamwidth:
+        return self.pattern().beamwidth(db)
+
+    def beamwidths(self, db = 3) -> Beamwidth:
+        # Every frequency in one pass, e.g. for HPBW against frequency
+        return beamwidth(self.angles_deg, self.powers, db)
+
+    @staticmethod
+    def mappable(path) -> bool:
+        import h5py
+        with h5py.File(path, 'r') as f:
+            return map_dataset(path, f['powers']) is not None
+
+    @staticmethod
+    @Tracing.traced('from_file.h5ant_multi')
+    def from_file(path, load_velocities=False, mmap=True):
+        import h5py
+        with h5py.File(path, 'r') as f:
+            angles = f['angles'][()]
+            frequencies = f['frequencies'][()]
+            powers = map_dataset(path, f['powers']) if mmap else None
+            if powers is None: powers = np.ascontiguousarray(f['powers'][()])
+            velocities = f['velocities'][()] if load_velocities else None
+
+        return MultiFrequencyMeasurement(
+            angles_deg = angles,
+            frequencies = frequencies,
+            velocities = velocities,
+            powers = powers
+        )
+
+    @property
+    def summary(self):
+        return (
+            f"Frequency: {self.frequency/1e9} [GHz]\n"
+            f"{self.pattern().summary}"
+        )
+
+
+
+
+@dataclass
+class SParameterMeasurement:
+    frequencies: np.ndarray # Hz
+    s: np.ndarray # frequencies x 2 x 2, complex
+    z0: float = 50.
+
+    def s_param(self, s: SParameter) -> np.ndarray:
+        return self.s[:, s.m, s.n]
+
+    def s_db(self, s: SParameter) -> np.ndarray:
+        return 20*np.log10(np.abs(self.s_param(s)))
+
+    def s_deg(self, s: SParameter) -> np.ndarray:
+        return np.angle(self.s_param(s), deg=True)
+
+    @staticmethod
+    @Tracing.traced('from_file.s2p')
+    def from_file(path):
+        frequencies, s, z0 = read_touchstone(path)
+        return SParameterMeasurement(frequencies=frequencies, s=s, z0=z0)
+
+    @staticmethod
+    def from_skrf(path):
+        # Reference reader, scikit-rf is optional and only imported here
+        import skrf as rf
+        network = rf.Network(path)
+        return SParameterMeasurement(
+            frequencies = network.f,
+            s = network.s,
+            z0 = float(np.real(network.z0[0, 0]))
+        )
@@ -0,0 +1,89 @@
+
+import heapq
+import itertools
+
+
+class ExtremesTracker:
+    '''Running peak and floor of a keyed set of (peak, floor) values.
+
+    Adding a key costs O(log n) for the heap pushes, removing one costs amortized O(log n) thanks
+    to lazy deletion from the heaps.
+    '''
+
+    def __init__(self):
+        self.peak = None
+        self.floor = None
+
+        self._values = {} # key: (peak, floor)
+        self._peaks = [] # max-heap as (-peak, tiebreak, key)
+        self._floors = [] # min-heap as (floor, tiebreak, key)
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values
+
+    def add(self, key, peak: float, floor: float) -> bool:
+        '''Insert or update key, returns True if the peak or floor changed.'''
+        if self._values.get(key) == (peak, floor): return False
+        if key in self._values:
+            before = (self.peak, self.floor)
+            self._discard(key)
+            self._insert(key, peak, floor)
+            self._settle()
+            return (self.peak, self.floor) != before
+
+        before = (self.peak, self.floor)
+        self._insert(key, peak, floor)
+        if self.peak is None or peak > self.peak: self.peak = peak
+        if self.floor is None or floor < self.floor: self.floor = floor
+        return (self.peak, self.floor) != before
+
+    def remove(self, key) -> bool:
+        '''Remove key if present, returns True if the peak or floor changed.'''
+        if key not in self._values: return False
+        before = (self.peak, self.floor)
+        self._discard(key)
+        self._settle()
+        return (self.peak, self.floor) != before
+
+    def reset(self, items) -> bool:
+        '''Replace everything with (key, peak, floor) items, returns True if the extremes changed.'''
+        before = (self.peak, self.floor)
+        self._values = {key: (peak, floor) for key, peak, floor in items}
+        self._rebuild()
+        self._settle()
+        return (self.peak, self.floor) != before
+
+    def _insert(self, key, peak, floor) -> None:
+        self._values[key] = (peak, floor)
+        heapq.heappush(self._peaks, (-peak, next(self._counter), key))
+        heapq.heappush(self._floors, (floor, next(self._counter), key))
+
+    def _discard(self, key) -> None:
+        # Heap entries are left in place and skipped once they surface
+        self._values.pop(key)
+
+    def _rebuild(self) -> None:
+        self._peaks = [(-peak, next(self._counter), key) for key, (peak, _) in self._values.items()]
+        self._floors = [(floor, next(self._counter), key) for key, (_, floor) in self._values.items()]
+        heapq.heapify(self._peaks)
+        heapq.heapify(self._floors)
+
+    def _stale(self, key, index, value) -> bool:
+        current = self._values.get(key)
+        return current is None or current[index] != value
+
+    def _settle(self) -> None:
+        # Rebuild once stale entries dominate, keeps the heaps O(n)
+        if max(len(self._peaks), len(self._floors)) > 2*len(self._values) + 32: self._rebuild()
+
+        while self._peaks and self._stale(self._peaks[0][2], 0, -self._peaks[0][0]):
+            heapq.heappop(self._peaks)
+        while self._floors and self._stale(self._floors[0][2], 1, self._floors[0][0]):
+            heapq.heappop(self._floors)
+
+        self.peak = -self._peaks[0][0] if self._peaks else None
+        self.floor = self._floors[0][0] if self._floors else None
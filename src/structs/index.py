@@ -0,0 +1,280 @@
+import os
+import sqlite3
+import time
+import numpy as np
+
+from contextlib import closing
+from dataclasses import dataclass
+
+from src.functions.metrics import batch_metrics
+from src.functions.sparameters import sparameter_figures
+from src.util import Logging, Path, Tracing
+
+from .data import MultiFrequencyMeasurement, SParameterMeasurement
+
+EXTENSIONS = {'.h5ant': 'h5ant', '.s2p': 's2p'}
+METRICS = ('peak', 'floor', 'peak_angle', 'hpbw', 'front_to_back', 'sidelobe_level')
+SCHEMA_VERSION = 2 # bumped when stored values change, older indexes are rebuilt
+
+SCHEMA = f'''
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    n_angles INTEGER,
+    n_frequencies INTEGER,
+    f_min REAL,
+    f_max REAL,
+    peak REAL,
+    peak_frequency REAL,
+    hpbw REAL,
+    s11_min_db REAL,
+    s11_min_frequency REAL,
+    s11_bandwidth REAL,
+    s21_max_db REAL,
+    error TEXT
+);
+CREATE TABLE metrics (
+    path TEXT NOT NULL,
+    frequency_index INTEGER NOT NULL,
+    frequency REAL NOT NULL,
+    {', '.join(f'{name} REAL' for name in METRICS)},
+    PRIMARY KEY (path, frequency_index)
+) WITHOUT ROWID;
+CREATE INDEX metrics_hpbw ON metrics (hpbw);
+CREATE INDEX files_kind ON files (kind);
+'''
+
+
+@dataclass
+class IndexUpdate:
+    indexed: int = 0
+    removed: int = 0
+    failed: int = 0
+    unchanged: int = 0
+    seconds: float = 0.
+
+
+class MeasurementIndex:
+    '''SQLite index of file metadata and per-frequency metrics, so files can be searched without opening them.
+
+    Entries are keyed by path and kept only while their mtime and size match the file, update() re-reads
+    nothing else. Every call opens its own connection, the index is used from the GUI and worker threads.
+    '''
+    CHUNK = 32 # files parsed and committed together
+
+    def __init__(self, path: str = None):
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        return self._path or Path.join(Path.cache_folder(), 'index.sqlite')
+
+    def connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=10)
+        db.row_factory = sqlite3.Row
+        # Readers keep working on the last commit while the indexer writes
+        db.execute('PRAGMA journal_mode=WAL')
+        if db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            with db:
+                db.execute('DROP TABLE IF EXISTS metrics')
+                db.execute('DROP TABLE IF EXISTS files')
+                db.executescript(SCHEMA)
+                db.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+        return db
+
+    @staticmethod
+    def find_files(root) -> dict:
+        # path: (mtime_ns, size) of every measurement file under root
+        found = {}
+        for folder, dirs, names in os.walk(root):
+            for name in names:
+                if os.path.splitext(name)[1].lower() not in EXTENSIONS: continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue # Removed while walking
+                found[path] = (stat.st_mtime_ns, stat.st_size)
+        return found
+
+    @Tracing.traced('index.update')
+    def update(self, root, progress=None) -> IndexUpdate:
+        '''Bring the entries under root up to date, parsing only new and modified files.
+
+        progress(done, total) is called after each chunk of parsed files.
+        '''
+        start = time.perf_counter()
+        root = os.path.abspath(root)
+        found = self.find_files(root)
+        prefix = os.path.join(root, '')
+        result = IndexUpdate()
+
+        with closing(self.connect()) as db:
+            known = {row['path']: (row['mtime_ns'], row['size']) for row in db.execute(
+                'SELECT path, mtime_ns, size FROM files WHERE substr(path, 1, ?) = ?', (len(prefix), prefix))}
+
+            removed = [(path,) for path in known if path not in found]
+            with db:
+                db.executemany('DELETE FROM metrics WHERE path = ?', removed)
+                db.executemany('DELETE FROM files WHERE path = ?', removed)
+            result.removed = len(removed)
+
+            changed = sorted(path for path, key in found.items() if known.get(path) != key)
+            result.unchanged = len(found) - len(changed)
+            for i in range(0, len(changed), self.CHUNK):
+                chunk = changed[i:i + self.CHUNK]
+                files, metrics = self.read_chunk(chunk, found)
+                self.write(db, files, metrics)
+                result.indexed += sum(row['error'] is None for row in files)
+                result.failed += sum(row['error'] is not None for row in files)
+                if progress is not None: progress(i + len(chunk), len(changed))
+
+        result.seconds = time.perf_counter() - start
+        if result.indexed or result.removed or result.failed:
+            Logging.get_logger('Index').info(
+                f'Indexed {result.indexed} files under {root} in {result.seconds:.1f} s '
+                f'({result.unchanged} unchanged, {result.removed} removed, {result.failed} failed)')
+        return result
+
+    def add(self, path) -> dict:
+        '''Index one file now, whether or not it changed. Returns its file row.'''
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        files, metrics = self.read_chunk([path], {path: (stat.st_mtime_ns, stat.st_size)})
+        with closing(self.connect()) as db:
+            self.write(db, files, metrics)
+        return files[0]
+
+    @staticmethod
+    def write(db: sqlite3.Connection, files: list[dict], metrics: list[tuple]) -> None:
+        with db:
+            db.executemany('DELETE FROM metrics WHERE path = ?', [(row['path'],) for row in files])
+            db.executemany(f'INSERT OR REPLACE INTO files ({", ".join(files[0])}) VALUES ({", ".join("?" * len(files[0]))})',
+                           [tuple(row.values()) for row in files])
+            db.executemany(f'INSERT INTO metrics VALUES ({", ".join("?" * (3 + len(METRICS)))})', metrics)
+
+    @staticmethod
+    def file_row(path, kind, key) -> dict:
+        row = dict.fromkeys((
+            'n_angles', 'n_frequencies', 'f_min', 'f_max', 'peak', 'peak_frequency', 'hpbw',
+            's11_min_db', 's11_min_frequency', 's11_bandwidth', 's21_max_db', 'error'
+        ))
+        return {'path': path, 'kind': kind, 'mtime_ns': key[0], 'size': key[1], **row}
+
+    def read_chunk(self, paths, found) -> tuple[list[dict], list[tuple]]:
+        files, metrics = [], []
+        antennas = [] # (row, measurement), reduced together below
+        for path in paths:
+            kind = EXTENSIONS[os.path.splitext(path)[1].lower()]
+            row = self.file_row(path, kind, found[path])
+            files.append(row)
+            try:
+                if kind == 'h5ant':
+                    antennas.append((row, MultiFrequencyMeasurement.from_file(path)))
+                    continue
+                meas = SParameterMeasurement.from_file(path)
+                figures = sparameter_figures(meas.frequencies, meas.s)
+                row.update(
+                    n_frequencies = figures['points'],
+                    f_min = figures['f_start'],
+                    f_max = figures['f_stop'],
+                    s11_min_db = figures['s11_min_db'],
+                    s11_min_frequency = figures['s11_min_frequency'],
+                    s11_bandwidth = figures['s11_bandwidth'],
+                    s21_max_db = figures['s21_max_db'],
+                )
+            except Exception as e:
+                row['error'] = f'{type(e).__name__}: {e}'
+
+        if not antennas: return files, metrics
+        try:
+            stacked = batch_metrics([meas for _, meas in antennas])
+        except Exception:
+            # One bad file should not fail the chunk, reduce them one at a time to find it
+            stacked = None
+        for i, (row, meas) in enumerate(antennas):
+            try:
+                rows = stacked[stacked['measurement'] == i] if stacked is not None else batch_metrics([meas])
+                metrics.extend(
+                    (row['path'], int(item['frequency_index']), float(item['frequency']), *(none_if_nan(item[name]) for name in METRICS))
+                    for item in rows
+                )
+                best = rows[np.argmax(rows['peak'])]
+                row.update(
+                    n_angles = len(meas.angles_deg),
+                    n_frequencies = meas.n_frequencies,
+                    f_min = float(np.min(meas.frequencies)),
+                    f_max = float(np.max(meas.frequencies)),
+                    peak = float(best['peak']),
+                    peak_frequency = float(best['frequency']),
+                    hpbw = none_if_nan(best['hpbw']),
+                )
+            except Exception as e:
+                row['error'] = f'{type(e).__name__}: {e}'
+                metrics = [item for item in metrics if item[0] != row['path']]
+        return files, metrics
+
+    def entry(self, path) -> dict | None:
+        '''The indexed file row of path, None if it is missing or out of date.'''
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with closing(self.connect()) as db:
+            row = db.execute('SELECT * FROM files WHERE path = ?', (path,)).fetchone()
+        if row is None or (row['mtime_ns'], row['size']) != (stat.st_mtime_ns, stat.st_size): return None
+        return dict(row)
+
+    def query(self, metric: str = 'hpbw', minimum: float = None, maximum: float = None,
+              frequency: float = None, path_contains: str = None) -> list[dict]:
+        '''Per-frequency rows of indexed .h5ant files with minimum <= metric <= maximum.
+
+        With frequency (Hz) only files whose band covers it are considered, each with its closest
+        measured frequency, e.g. query('hpbw', 60, frequency=1575.42e6, path_contains='vport').
+        '''
+        if metric not in METRICS: raise ValueError(f'Unknown metric {metric!r}, expected one of {", ".join(METRICS)}')
+        conditions, params = ['f.error IS NULL'], {}
+        if path_contains is not None:
+            conditions.append("f.path LIKE :pattern ESCAPE '\\'")
+            escaped = path_contains.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params['pattern'] = f'%{escaped}%'
+        rank = ''
+        if frequency is not None:
+            conditions.append(':frequency BETWEEN f.f_min AND f.f_max')
+            rank = ', ROW_NUMBER() OVER (PARTITION BY m.path ORDER BY abs(m.frequency - :frequency)) AS rank'
+            params['frequency'] = frequency
+
+        outer = ['rank = 1'] if frequency is not None else []
+        if minimum is not None:
+            outer.append(f'{metric} >= :minimum')
+            params['minimum'] = minimum
+        if maximum is not None:
+            outer.append(f'{metric} <= :maximum')
+            params['maximum'] = maximum
+
+        sql = (
+            f'SELECT * FROM (SELECT m.*{rank} FROM metrics m JOIN files f ON f.path = m.path '
+            f'WHERE {" AND ".join(conditions)})'
+            + (f' WHERE {" AND ".join(outer)}' if outer else '')
+            + ' ORDER BY path, frequency_index'
+        )
+        with closing(self.connect()) as db:
+            rows = [dict(row) for row in db.execute(sql, params)]
+        for row in rows: row.pop('rank', None)
+        return rows
+
+    def clear(self) -> None:
+        with closing(self.connect()) as db, db:
+            db.execute('DELETE FROM metrics')
+            db.execute('DELETE FROM files')
+
+
+def none_if_nan(value):
+    value = float(value)
+    return None if value != value else value
+
+
+measurement_index = MeasurementIndex()
@@ -0,0 +1,161 @@
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import numpy as np
+
+from dataclasses import fields
+
+from src.util import Path
+
+from .data import MultiFrequencyMeasurement, SParameterMeasurement
+
+
+class SidecarCache:
+    '''On-disk cache of parsed measurement arrays, stored as .npy files that are memory-mapped on load.'''
+
+    META_FILE = 'meta.json'
+
+    def __init__(self, folder: str = None, max_bytes: int = 2 * 2**30):
+        self._folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def folder(self) -> str:
+        if self._folder is None: return Path.cache_folder()
+        Path.verify_existance(self._folder)
+        return self._folder
+
+    def entry_folder(self, path) -> str:
+        name = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        return Path.join(self.folder, name)
+
+    @staticmethod
+    def content_hash(path) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(2**20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def load(self, path, cls):
+        entry = self.entry_folder(path)
+        stat = os.stat(path)
+        meta = self._read_meta(entry)
+
+        if meta is not None and meta['kind'] == cls.__name__:
+            valid = (meta['mtime_ns'], meta['size']) == (stat.st_mtime_ns, stat.st_size)
+
+            # Touched but possibly unchanged, only then is the content hash worth computing
+            if not valid and meta['size'] == stat.st_size and meta['hash'] == self.content_hash(path):
+                meta['mtime_ns'] = stat.st_mtime_ns
+                self._write_meta(entry, meta)
+                valid = True
+
+            if valid:
+                try:
+                    return self._restore(entry, meta, cls)
+                except (OSError, ValueError):
+                    pass # Damaged entry, parse again and overwrite it
+
+        obj = cls.from_file(path)
+        try:
+            self.store(path, obj, stat)
+        except OSError:
+            pass # The cache is an optimization, never fail a load because of it
+        return obj
+
+    def store(self, path, obj, stat: os.stat_result = None) -> None:
+        if stat is None: stat = os.stat(path)
+        meta = {
+            'source': os.path.abspath(path),
+            'kind': type(obj).__name__,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'hash': self.content_hash(path),
+            'arrays': [],
+            'scalars': {}
+        }
+
+        tmp = tempfile.mkdtemp(prefix='.tmp', dir=self.folder)
+        try:
+            for field in fields(obj):
+                if not field.init: continue # Memoized values, rebuilt on demand
+                value = getattr(obj, field.name)
+                if isinstance(value, np.ndarray):
+                    np.save(Path.join(tmp, f'{field.name}.npy'), value)
+                    meta['arrays'].append(field.name)
+                else:
+                    meta['scalars'][field.name] = value.item() if isinstance(value, np.generic) else value
+            self._write_meta(tmp, meta)
+
+            entry = self.entry_folder(path)
+            with self._lock:
+                shutil.rmtree(entry, ignore_errors=True)
+                os.replace(tmp, entry)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self.evict()
+
+    def entries(self) -> list:
+        # (last used, bytes, folder) for every entry
+        result = []
+        for name in os.listdir(self.folder):
+            if name.startswith('.'): continue # Entries still being written
+            entry = Path.join(self.folder, name)
+            meta_path = Path.join(entry, self.META_FILE)
+            if not os.path.isfile(meta_path): continue
+            nbytes = sum(os.path.getsize(Path.join(entry, f)) for f in os.listdir(entry))
+            result.append((os.path.getmtime(meta_path), nbytes, entry))
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return sum(nbytes for _, nbytes, _ in self.entries())
+
+    def evict(self) -> None:
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(nbytes for _, nbytes, _ in entries)
+            for _, nbytes, entry in entries:
+                if total <= self.max_bytes: break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, entry in self.entries():
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _restore(self, entry, meta, cls):
+        os.utime(Path.join(entry, self.META_FILE)) # Last used, drives eviction order
+        arrays = {name: np.load(Path.join(entry, f'{name}.npy'), mmap_mode='r') for name in meta['arrays']}
+        return cls(**arrays, **meta['scalars'])
+
+    def _read_meta(self, entry) -> dict | None:
+        try:
+            with open(Path.join(entry, self.META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, entry, meta) -> None:
+        with open(Path.join(entry, self.META_FILE), 'w') as f:
+            json.dump(meta, f)
+
+
+sidecar_cache = SidecarCache()
+
+
+def load_measurement(path) -> MultiFrequencyMeasurement:
+    # A contiguous powers dataset is mapped straight from the source, a sidecar copy would gain nothing
+    if MultiFrequencyMeasurement.mappable(path): return MultiFrequencyMeasurement.from_file(path)
+    return sidecar_cache.load(path, MultiFrequencyMeasurement)
+
+def load_sparameters(path) -> SParameterMeasurement:
+    return sidecar_cache.load(path, SParameterMeasurement)
@@ -0,0 +1,124 @@
+# Touchstone v1/v2 reader for 2-port files, parses the numeric block in one pass.
+
+import re
+import warnings
+import numpy as np
+
+FREQUENCY_UNITS = {'HZ': 1., 'KHZ': 1e3, 'MHZ': 1e6, 'GHZ': 1e9}
+FORMATS = ('MA', 'DB', 'RI')
+
+COMMENT = re.compile(r'!.*')
+
+# Column order of the four parameters in a 2-port data line, as (m, n) into the 2 x 2 matrix
+ORDER_21_12 = ((0, 0), (1, 0), (0, 1), (1, 1)) # Version 1 and the v2 default
+ORDER_12_21 = ((0, 0), (0, 1), (1, 0), (1, 1))
+
+
+def parse_option_line(line: str, options: dict) -> None:
+    tokens = line[1:].upper().split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in FREQUENCY_UNITS: options['unit'] = token
+        elif token in FORMATS: options['format'] = token
+        elif token == 'R':
+            options['z0'] = float(tokens[i + 1])
+            i += 1
+        elif token in ('S', 'Y', 'Z', 'H', 'G'):
+            if token != 'S': raise ValueError(f'Only S-parameter files are supported, got {token}')
+        else:
+            raise ValueError(f'Unknown option {token!r} in {line.strip()!r}')
+        i += 1
+
+
+def directive_lines(text: str):
+    # (start, end) of every option (#) and keyword ([...]) line. Neither character can appear in
+    # numeric data, so str.find jumps straight to them instead of walking every line.
+    markers = []
+    for char in '#[':
+        i = text.find(char)
+        while i >= 0:
+            markers.append(i)
+            i = text.find(char, i + 1)
+
+    for i in sorted(markers):
+        start = text.rfind('\n', 0, i) + 1
+        end = text.find('\n', i)
+        yield start, len(text) if end < 0 else end
+
+
+def network_values(values: np.ndarray, version: int, path) -> np.ndarray:
+    '''The network data of the parsed number stream, without a version 1 noise block.'''
+    # Version 1 noise parameters (5 values per line) follow the network data, starting at the first frequency
+    # that does not increase. Up to there the stream is aligned to 9 values per line, so striding finds it
+    decreasing = np.flatnonzero(np.diff(values[::9]) <= 0)
+    if version == 1 and decreasing.size:
+        noise = values[9 * (decreasing[0] + 1):]
+        if noise.size % 5 == 0 and np.all(noise[::5] > 0) and np.all(np.diff(noise[::5]) > 0):
+            return values[:9 * (decreasing[0] + 1)]
+
+    if values.size % 9:
+        raise ValueError(f'Malformed network data in {path}: {values.size} values is not a multiple of 9')
+    if decreasing.size:
+        # Kept like scikit-rf does, the rows may still be meaningful
+        warnings.warn(f'Frequencies in {path} do not increase, row {decreasing[0] + 2} repeats or goes back', stacklevel=3)
+    return values
+
+
+def read_touchstone(path) -> tuple[np.ndarray, np.ndarray, float]:
+    '''Read a 2-port Touchstone file, returns (frequencies [Hz], s [F x 2 x 2 complex], z0).'''
+    options = {'unit': 'GHZ', 'format': 'MA', 'z0': 50.}
+    order = ORDER_21_12
+    version = 1 # Version 2 files start with a [Version] keyword
+
+    with open(path, 'r') as f:
+        text = f.read()
+    if '!' in text: text = COMMENT.sub('', text)
+
+    # Only the few option and keyword lines are handled in Python, the data block is parsed in bulk
+    data = []
+    position = 0
+    for start, end in directive_lines(text):
+        data.append(text[position:start])
+        position = end
+        line = text[start:end].strip()
+        if line.startswith('#'):
+            parse_option_line(line, options)
+            continue
+
+        keyword, _, value = line[1:].partition(']')
+        keyword, value = keyword.strip().lower(), value.strip()
+        if keyword == 'version':
+            version = int(float(value))
+        elif keyword == 'number of ports' and int(value) != 2:
+            raise ValueError(f'Expected a 2-port file, got {value} ports')
+        elif keyword == 'two-port data order':
+            order = ORDER_12_21 if value.upper() == '12_21' else ORDER_21_12
+        elif keyword == 'reference' and value:
+            options['z0'] = float(value.split()[0])
+        elif keyword in ('noise data', 'end'):
+            position = len(text)
+            break
+    data.append(text[position:])
+    text = ' '.join(data)
+
+    with warnings.catch_warnings():
+        # numpy only warns when it stops at text it cannot parse
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            values = np.fromstring(text, sep=' ')
+        except DeprecationWarning:
+            raise ValueError(f'Malformed network data in {path}')
+    values = network_values(values, version, path).reshape(-1, 9)
+
+    frequencies = values[:, 0] * FREQUENCY_UNITS[options['unit']]
+    first, second = values[:, 1::2], values[:, 2::2]
+    match options['format']:
+        case 'RI': params = first + 1j*second
+        case 'MA': params = first * np.exp(1j*np.deg2rad(second))
+        case 'DB': params = 10**(first/20) * np.exp(1j*np.deg2rad(second))
+
+    s = np.empty((len(frequencies), 2, 2), dtype=complex)
+    for column, (m, n) in enumerate(order):
+        s[:, m, n] = params[:, column]
+    return frequencies, s, options['z0']
@@ -1,38 +1,52 @@
 
 
+import atexit
 import logging
-from PySide6.QtWidgets import QTextEdit
-from PySide6.QtCore import QObject, Signal
-from PySide6.QtGui import QTextCursor
+import logging.handlers
+import queue
 
-class QTextEditHandler(logging.Handler, QObject):
-    log_signal = Signal(str)  # thread-safe signal to update QTextEdit
+FORMAT = '%(asctime)s [%(levelname)s] [%(name)s]: %(message)s'
+MAX_LOG_BYTES = 5 * 2**20
+LOG_BACKUPS = 3
 
-    def __init__(self, widget: QTextEdit):
-        QObject.__init__(self)
-        logging.Handler.__init__(self)
-        self.widget = widget
-        self.log_signal.connect(self.append_log)
-
-    def emit(self, record):
-        log_entry = self.format(record)
-        self.log_signal.emit(log_entry)
-
-    def append_log(self, msg):
-        self.widget.append(msg)
-        self.widget.moveCursor(QTextCursor.End)
+_listener = None
 
 
 def setup_logging(textedit = None, log_folder = '.', ) -> None:
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s [%(levelname)s] [%(name)s]: %(message)s',
-        handlers=[
-            logging.FileHandler(f'{log_folder}/app.log'),
-            logging.StreamHandler(),
-            QTextEditHandler(textedit)
-        ]
-    )
+    # Loggers only put records on a queue, formatting and all I/O happen on the listener thread
+    global _listener
+    if _listener is not None: _listener.stop()
+
+    handlers = [
+        logging.handlers.RotatingFileHandler(f'{log_folder}/app.log', maxBytes=MAX_LOG_BYTES, backupCount=LOG_BACKUPS),
+        logging.StreamHandler(),
+    ]
+    if textedit is not None:
+        from .QtLogging import QTextEditHandler
+        handlers.append(QTextEditHandler(textedit))
+
+    formatter = logging.Formatter(FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging() -> None:
+    # Flushes what is still queued, registered to run at exit
+    global _listener
+    if _listener is None: return
+    _listener.stop()
+    _listener = None
+
+atexit.register(stop_logging)
 
 def get_logger(name: str) -> logging.Logger:
-    return logging.getLogger(name)
\ No newline at end of file
+    return logging.getLogger(name)
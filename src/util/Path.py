@@ -30,10 +30,16 @@ def debug_folder() -> str:
     verify_existance(path)
     return path
 
+def cache_folder() -> str:
+    path = os.path.join(os.getcwd(), 'cache')
+    verify_existance(path)
+    return path
+
 def join(*args) -> str:
     return os.path.join(*args)
 
 
 def initialize() -> None:
     output_folder()
-    debug_folder()
\ No newline at end of file
+    debug_folder()
+    cache_folder()
\ No newline at end of file
@@ -0,0 +1,51 @@
+# Qt log sink, kept apart from Logging so headless tools never import PySide6
+
+import logging
+import threading
+from PySide6.QtWidgets import QPlainTextEdit, QTextEdit
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtGui import QTextCursor
+
+class QTextEditHandler(logging.Handler, QObject):
+    '''Collects records from any thread and appends them to the widget in one insert per flush interval.
+
+    The widget keeps at most max_lines lines, the oldest are dropped first.
+    '''
+    pending = Signal()  # queued to the GUI thread once per batch, not per record
+
+    def __init__(self, widget: QTextEdit | QPlainTextEdit, max_lines: int = 2000, interval_ms: int = 100):
+        QObject.__init__(self)
+        logging.Handler.__init__(self)
+        self.widget = widget
+        self.widget.document().setMaximumBlockCount(max_lines)
+        self.max_lines = max_lines
+        self.lines = []
+        self.lines_lock = threading.Lock()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush_lines)
+        self.pending.connect(self.timer.start)
+
+    def emit(self, record):
+        log_entry = self.format(record)
+        with self.lines_lock:
+            first = not self.lines
+            self.lines.append(log_entry)
+        if first: self.pending.emit()
+
+    def flush_lines(self) -> None:
+        with self.lines_lock:
+            lines, self.lines = self.lines[-self.max_lines:], []
+        if not lines: return
+
+        # Follow the end only if the user has not scrolled up to read something
+        scrollbar = self.widget.verticalScrollBar()
+        at_end = scrollbar.value() == scrollbar.maximum()
+
+        cursor = QTextCursor(self.widget.document())
+        cursor.movePosition(QTextCursor.End)
+        text = '\n'.join(lines)
+        cursor.insertText(text if self.widget.document().isEmpty() else '\n' + text)
+        if at_end: scrollbar.setValue(scrollbar.maximum())
@@ -0,0 +1,146 @@
+# Lightweight timing spans for the expensive steps, with rolling percentiles and Chrome-trace export.
+#
+#   with Tracing.span('normalize'): ...
+#   @Tracing.traced('from_file.h5ant')
+#
+# Dumped traces open in chrome://tracing or https://ui.perfetto.dev
+
+import functools
+import json
+import os
+import threading
+import time
+
+from collections import deque
+from contextlib import contextmanager
+
+from src.util import Logging, Path
+
+WINDOW = 1000 # durations kept per span name for the percentiles
+MAX_EVENTS = 50_000 # spans kept for the Chrome trace
+SLOW_MS = 1000. # spans slower than this are logged as warnings
+
+_lock = threading.Lock()
+_durations = {} # name: deque of the last WINDOW durations [ms]
+_totals = {} # name: (count, total ms) since the last reset
+_events = deque(maxlen=MAX_EVENTS)
+_origin_ns = time.perf_counter_ns()
+enabled = True
+
+
+def record(name: str, start_ns: int, end_ns: int, args: dict | None = None) -> None:
+    duration_ms = (end_ns - start_ns) / 1e6
+    with _lock:
+        if name not in _durations: _durations[name] = deque(maxlen=WINDOW)
+        _durations[name].append(duration_ms)
+        count, total = _totals.get(name, (0, 0.))
+        _totals[name] = (count + 1, total + duration_ms)
+        _events.append((name, start_ns, end_ns, threading.get_ident(), args))
+
+    if duration_ms > SLOW_MS:
+        Logging.get_logger('Tracing').warning(f'Slow {name}: {duration_ms:.0f} ms{format_args(args)}')
+
+
+def format_args(args: dict | None) -> str:
+    if not args: return ''
+    return ' (' + ', '.join(f'{key}={value}' for key, value in args.items()) + ')'
+
+
+@contextmanager
+def span(name: str, **args):
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(name, start, time.perf_counter_ns(), args or None)
+
+
+def traced(name: str):
+    '''Decorator recording every call of the function as a span.'''
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled: return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter_ns())
+        return wrapper
+    return decorator
+
+
+def percentile(ordered: list, q: float) -> float:
+    # Linear interpolation between the closest ranks, like numpy's default
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def stats() -> dict:
+    '''name: {count, total, mean, p50, p90, p99, max} in ms, percentiles over the last WINDOW spans.'''
+    with _lock:
+        windows = {name: sorted(durations) for name, durations in _durations.items()}
+        totals = dict(_totals)
+
+    result = {}
+    for name, ordered in windows.items():
+        count, total = totals[name]
+        result[name] = {
+            'count': count,
+            'total': total,
+            'mean': total / count,
+            'p50': percentile(ordered, .5),
+            'p90': percentile(ordered, .9),
+            'p99': percentile(ordered, .99),
+            'max': ordered[-1],
+        }
+    return result
+
+
+def reset() -> None:
+    with _lock:
+        _durations.clear()
+        _totals.clear()
+        _events.clear()
+
+
+def log_summary() -> None:
+    logger = Logging.get_logger('Tracing')
+    summary = stats()
+    if not summary:
+        logger.info('No spans recorded')
+        return
+    for name, values in sorted(summary.items(), key=lambda item: -item[1]['total']):
+        logger.info(
+            f"{name}: {values['count']} calls, total {values['total']:.0f} ms, "
+            f"p50 {values['p50']:.1f} ms, p90 {values['p90']:.1f} ms, p99 {values['p99']:.1f} ms, max {values['max']:.1f} ms"
+        )
+
+
+def dump_chrome_trace(path=None) -> str:
+    '''Write the recorded spans as Chrome trace events, by default to the debug folder. Returns the path.'''
+    if path is None:
+        path = Path.join(Path.debug_folder(), time.strftime('trace_%Y%m%d_%H%M%S.json'))
+    with _lock:
+        events = list(_events)
+
+    pid = os.getpid()
+    trace = [{
+        'name': name,
+        'ph': 'X',
+        'ts': (start - _origin_ns) / 1e3, # µs
+        'dur': (end - start) / 1e3,
+        'pid': pid,
+        'tid': tid,
+        **({'args': {key: str(value) for key, value in args.items()}} if args else {}),
+    } for name, start, end, tid, args in events]
+
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+    Logging.get_logger('Tracing').info(f'Wrote {len(trace)} spans to {path}')
+    return path
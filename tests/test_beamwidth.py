@@ -0,0 +1,80 @@
+import numpy as np
+
+from src.enums import Sign
+from src.functions.beamwidth import beamwidth
+from src.structs.data import AntennaMeasurement
+
+ANGLES = np.linspace(-180, 180, 3600, endpoint=False)
+
+
+def gaussian_pattern(angles_deg, center_deg, hpbw_deg, peak_db=-20.):
+    # Exactly level_db=3 down at half the beamwidth either side of the center
+    offset = (angles_deg - center_deg + 180) % 360 - 180
+    return peak_db - 12 * (offset / hpbw_deg)**2
+
+
+def reference_crossing(angles_deg, power, direction, db=3.):
+    '''(angle, index) of the first sample below the peak - db walking one sample at a time, like the original loop.'''
+    i = int(np.argmax(power))
+    threshold = power[i] - db
+    for _ in range(len(power)):
+        j = (i + direction) % len(power)
+        if power[j] < threshold:
+            frac = (power[i] - threshold) / (power[i] - power[j])
+            step = (angles_deg[j] - angles_deg[i] + 180) % 360 - 180
+            return (angles_deg[i] + frac * step + 180) % 360 - 180, j
+        i = j
+    return np.nan, None
+
+
+def test_matches_reference_loop():
+    rng = np.random.default_rng(0)
+    powers = np.column_stack([
+        gaussian_pattern(ANGLES, center, width) + rng.normal(0, .2, len(ANGLES))
+        for center, width in ((0, 40), (95, 60), (-170, 25), (179.9, 80))
+    ])
+    bw = beamwidth(ANGLES, powers)
+    for col in range(powers.shape[1]):
+        power = powers[:, col]
+        left, left_index = reference_crossing(ANGLES, power, 1)
+        right, right_index = reference_crossing(ANGLES, power, -1)
+        assert np.isclose(bw.left[col], left)
+        assert np.isclose(bw.right[col], right)
+        assert np.isclose(bw.width[col], (left - right) % 360)
+        assert bw.peak_index[col] == np.argmax(power)
+
+        meas = AntennaMeasurement(ANGLES, 1e9, None, power)
+        assert meas.dist_from_peak(Sign.POSITIVE) == left_index
+        assert meas.dist_from_peak(Sign.NEGATIVE) == right_index
+
+
+def test_wraps_around_180():
+    bw = beamwidth(ANGLES, gaussian_pattern(ANGLES, 175, 20))
+    assert np.isclose(bw.left, -175, atol=.1)
+    assert np.isclose(bw.right, 165, atol=.1)
+    assert np.isclose(bw.width, 20, atol=.1)
+
+
+def test_unsorted_angles():
+    power = gaussian_pattern(ANGLES, 30, 50)
+    order = np.random.default_rng(1).permutation(len(ANGLES))
+    expected = beamwidth(ANGLES, power)
+    bw = beamwidth(ANGLES[order], power[order])
+    assert np.isclose(bw.left, expected.left)
+    assert np.isclose(bw.right, expected.right)
+    assert np.isclose(bw.width, expected.width)
+    # peak_index refers to the samples as given
+    assert order[bw.peak_index] == expected.peak_index
+
+
+def test_no_crossing():
+    flat = np.column_stack([np.full(len(ANGLES), -20.), gaussian_pattern(ANGLES, 0, 40)])
+    flat[0, 0] = -19. # A peak, but nothing 3 dB below it
+    bw = beamwidth(ANGLES, flat)
+    assert np.isnan(bw.left[0]) and np.isnan(bw.right[0]) and np.isnan(bw.width[0])
+    assert np.isfinite(bw.width[1])
+
+    meas = AntennaMeasurement(ANGLES, 1e9, None, flat[:, 0])
+    assert meas.dist_from_peak(Sign.POSITIVE) is None
+    assert meas.dist_from_peak(Sign.NEGATIVE) is None
+    assert np.isnan(meas.HPBW)
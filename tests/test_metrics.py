@@ -0,0 +1,72 @@
+import numpy as np
+
+from src.functions.beamwidth import wrap_deg
+from src.functions.metrics import batch_metrics
+from src.structs.data import MultiFrequencyMeasurement
+
+ANGLES = np.linspace(-180, 180, 3600, endpoint=False)
+FIRST_SIDELOBE_DB = -13.26 # of a uniform aperture, 20 log10 |sinc| at its first maximum
+
+
+def offsets(angles_deg, center_deg):
+    return (angles_deg - center_deg + 180) % 360 - 180
+
+
+def sinc_pattern(angles_deg, center_deg, width_deg, peak_db=-25.):
+    return peak_db + 20 * np.log10(np.abs(np.sinc(offsets(angles_deg, center_deg) / width_deg)) + 1e-4)
+
+
+def gaussian_pattern(angles_deg, center_deg, hpbw_deg, peak_db=-20.):
+    # Falls monotonically to the back, no sidelobes
+    return peak_db - 12 * (offsets(angles_deg, center_deg) / hpbw_deg)**2
+
+
+def measurement(angles_deg, columns) -> MultiFrequencyMeasurement:
+    powers = np.column_stack(columns)
+    return MultiFrequencyMeasurement(
+        angles_deg = angles_deg,
+        frequencies = np.linspace(1e9, 2e9, powers.shape[1]),
+        velocities = None,
+        powers = powers
+    )
+
+
+def test_batch_matches_per_measurement():
+    rng = np.random.default_rng(0)
+    coarse = np.linspace(-180, 180, 720, endpoint=False)
+    measurements = [
+        measurement(ANGLES, [sinc_pattern(ANGLES, 0, 30), gaussian_pattern(ANGLES, 120, 60)]),
+        measurement(ANGLES, [sinc_pattern(ANGLES, -150, 40) + rng.normal(0, .3, len(ANGLES))]),
+        measurement(coarse, [gaussian_pattern(coarse, 175, 45), sinc_pattern(coarse, 60, 25)]), # Another angle grid
+    ]
+    result = batch_metrics(measurements)
+    assert len(result) == sum(meas.n_frequencies for meas in measurements)
+
+    for row in result:
+        meas = measurements[row['measurement']]
+        pattern = meas.pattern(int(row['frequency_index']))
+        assert row['frequency'] == pattern.frequency
+        assert np.isclose(row['peak'], pattern.peak)
+        assert np.isclose(row['floor'], pattern.floor)
+        assert np.isclose(row['peak_angle'], pattern.angle_at_peak)
+        assert np.isclose(row['hpbw'], pattern.HPBW)
+        assert np.isclose(row['hpbw_left'], pattern.HPBW_left)
+        assert np.isclose(row['hpbw_right'], pattern.HPBW_right)
+        back = pattern.power_at(wrap_deg(pattern.angle_at_peak + 180))
+        assert np.isclose(row['front_to_back'], pattern.peak - back)
+
+
+def test_sinc_first_sidelobe():
+    rng = np.random.default_rng(1)
+    clean = sinc_pattern(ANGLES, 20, 30)
+    noisy = [clean + rng.normal(0, .3, len(ANGLES)) for _ in range(8)]
+    result = batch_metrics([measurement(ANGLES, [clean, *noisy])])
+    assert np.isclose(result['sidelobe_level'][0], FIRST_SIDELOBE_DB, atol=.1)
+    # Ripple on the main lobe must not count as a null
+    assert np.allclose(result['sidelobe_level'][1:], FIRST_SIDELOBE_DB, atol=1.)
+
+
+def test_no_sidelobe():
+    result = batch_metrics([measurement(ANGLES, [gaussian_pattern(ANGLES, 0, 60)])])
+    assert np.isnan(result['sidelobe_level'][0])
+    assert np.isclose(result['hpbw'][0], 60, atol=.1)
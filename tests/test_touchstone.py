@@ -0,0 +1,48 @@
+import os
+import numpy as np
+import pytest
+
+from src.structs.touchstone import read_touchstone
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def test_noise_block_is_dropped():
+    frequencies, s, z0 = read_touchstone(os.path.join(FIXTURES, 'noise_v1.s2p'))
+    assert np.allclose(frequencies, [1e9, 2e9, 3e9, 4e9])
+    assert s.shape == (4, 2, 2)
+    assert z0 == 50.
+    # Version 1 order is S11 S21 S12 S22
+    assert np.isclose(s[3, 1, 0], 1.2 * np.exp(-1j * np.deg2rad(5)))
+    assert np.isclose(s[3, 0, 1], 0.03 * np.exp(1j * np.deg2rad(75)))
+
+
+def test_noise_block_matches_skrf():
+    skrf = pytest.importorskip('skrf')
+    path = os.path.join(FIXTURES, 'noise_v1.s2p')
+    frequencies, s, _ = read_touchstone(path)
+    network = skrf.Network(path)
+    assert np.allclose(frequencies, network.f)
+    assert np.allclose(s, network.s)
+
+
+def test_repeated_frequency_keeps_every_row(tmp_path):
+    path = tmp_path / 'repeated.s2p'
+    rows = [f'{f} 0.5 -45 2.0 10 0.1 90 0.4 -30' for f in (1, 2, 2, 3)]
+    path.write_text('# GHz S MA R 50\n' + '\n'.join(rows) + '\n')
+    with pytest.warns(UserWarning, match='do not increase'):
+        frequencies, s, _ = read_touchstone(path)
+    assert np.allclose(frequencies, [1e9, 2e9, 2e9, 3e9])
+    assert s.shape == (4, 2, 2)
+
+
+def test_repeated_frequency_matches_skrf(tmp_path):
+    skrf = pytest.importorskip('skrf')
+    path = tmp_path / 'repeated.s2p'
+    rows = [f'{f} 0.5 -45 2.0 10 0.1 90 0.4 -30' for f in (1, 2, 2, 3)]
+    path.write_text('# GHz S MA R 50\n' + '\n'.join(rows) + '\n')
+    with pytest.warns(UserWarning):
+        frequencies, s, _ = read_touchstone(path)
+        network = skrf.Network(str(path))
+    assert np.allclose(frequencies, network.f)
+    assert np.allclose(s, network.s)